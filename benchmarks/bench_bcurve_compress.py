@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+__author__ = 'andyguo'
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from dayu_file_format.curve import Curve
+
+
+def best_of(func, repeat=5):
+    result = []
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        result.append(time.time() - start)
+    return min(result)
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    t = np.arange(1001, 1001 + count, dtype=np.float64)
+    y = np.sin(t * 0.01) * 12.5 + t * 0.003
+    slope = np.cos(t * 0.01) * 0.125 + 0.003
+    norm = np.sqrt(1 + slope * slope)
+    curve = Curve.from_numpy((t, y, -1 / norm, -slope / norm, 1 / norm, slope / norm))
+
+    folder = tempfile.mkdtemp()
+    sizes = {}
+    for label, kwargs in (('keyf (v0.1, float32)', {}),
+                          ('kf64 (v2, float64)', {'bcurve_version': 2}),
+                          ('keyz (v2, compressed)', {'bcurve_compress': True})):
+        path = os.path.join(folder, '{}.bcurve'.format(len(sizes)))
+        curve.save(path, **kwargs)
+        sizes[label] = os.path.getsize(path)
+        seconds = best_of(lambda: Curve.load(path, compact=True))
+        print '{:<24} {:>10} bytes  ratio vs kf64 {:5.2f}x  load {:7.4f} s  {:8.1f} MB/s decoded'.format(
+            label, sizes[label], float(count * 48) / sizes[label], seconds, count * 48 / seconds / 1e6)
+    shutil.rmtree(folder)
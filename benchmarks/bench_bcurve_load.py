@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+__author__ = 'andyguo'
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from dayu_file_format.curve import Curve
+
+
+BASELINE_LOAD = """
+import sys, time
+from dayu_file_format.curve import Curve
+start = time.time()
+curve = Curve.load(sys.argv[1])
+print time.time() - start, len(curve._keyframes)
+"""
+
+
+def baseline_load(file_path, revision):
+    # the original loader, checked out from git and run in its own interpreter
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    folder = tempfile.mkdtemp()
+    try:
+        subprocess.check_call('git archive {} dayu_file_format | tar -x -C {}'.format(revision, folder),
+                              shell=True, cwd=root)
+        output = subprocess.check_output([sys.executable, '-c', BASELINE_LOAD, file_path],
+                                         cwd=folder, env=dict(os.environ, PYTHONPATH=folder))
+    finally:
+        shutil.rmtree(folder)
+    seconds, count = output.split()
+    print '{:<32} {:8.3f} s  ({} keys, {})'.format('original loader', float(seconds), count, revision[:7])
+    return float(seconds)
+
+
+def bench(label, func, repeat=3):
+    seconds = min(_timed(func) for _ in range(repeat))
+    print '{:<32} {:8.3f} s'.format(label, seconds)
+    return seconds
+
+
+def _timed(func):
+    start = time.time()
+    func()
+    return time.time() - start
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit('usage: bench_bcurve_load.py <revision of the original loader> [key count]')
+    revision = subprocess.check_output(['git', 'rev-parse', '--verify', sys.argv[1] + '^{commit}']).strip()
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+    t = np.arange(count, dtype=np.float64)
+    columns = np.column_stack((t, np.sin(t * 0.01), -np.ones(count), np.zeros(count),
+                               np.ones(count), np.zeros(count)))
+    folder = tempfile.mkdtemp()
+    try:
+        path = os.path.join(folder, 'bench.bcurve')
+        Curve.from_numpy(columns).save(path, name='bench', frames=count)
+        print '{} keys, {} bytes'.format(count, os.stat(path).st_size)
+
+        legacy = baseline_load(path, revision)
+        whole = bench('whole-buffer load', lambda: Curve.load(path))
+        compact = bench('whole-buffer load, compact', lambda: Curve.load(path, compact=True))
+        mapped = bench('mmap load', lambda: Curve.load(path, mmap=True))
+        print 'speedup whole-buffer: {:.1f}x, compact: {:.1f}x'.format(legacy / whole, legacy / compact)
+    finally:
+        shutil.rmtree(folder)
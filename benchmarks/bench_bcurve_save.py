@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+__author__ = 'andyguo'
+
+import os
+import struct
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from dayu_file_format.curve import Curve
+
+
+def legacy_write_keyframe_part(curve, file_obj):
+    file_obj.write(struct.pack('>I 4s', 8 + len(curve) * 24, 'keyf'))
+    for k in curve:
+        file_obj.write(struct.pack('>6f', k.current.x, k.current.y, k.left.x, k.left.y, k.right.x, k.right.y))
+
+
+def bench(label, func, repeat=3):
+    seconds = min(_timed(func) for _ in range(repeat))
+    print '{:<32} {:8.3f} s'.format(label, seconds)
+    return seconds
+
+
+def _timed(func):
+    start = time.time()
+    func()
+    return time.time() - start
+
+
+def _write(path, writer):
+    with open(path, 'wb') as bf:
+        writer(bf)
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    t = np.arange(count, dtype=np.float64)
+    columns = np.column_stack((t, np.sin(t * 0.01), -np.ones(count), np.zeros(count),
+                               np.ones(count), np.zeros(count)))
+    compact = Curve.from_numpy(columns)
+    curve = Curve.from_arrays(t, columns[:, 1], left=columns[:, 2:4], right=columns[:, 4:])
+    path = os.path.join(tempfile.mkdtemp(), 'bench.keyf')
+
+    legacy = bench('legacy per-key writes', lambda: _write(path, lambda bf: legacy_write_keyframe_part(curve, bf)),
+                   repeat=1)
+    chunked = bench('chunked writer', lambda: _write(path, curve._write_keyframe_part))
+    columnar = bench('chunked writer, compact', lambda: _write(path, compact._write_keyframe_part))
+    print 'speedup chunked: {:.1f}x, compact: {:.1f}x'.format(legacy / chunked, legacy / columnar)
+    os.remove(path)
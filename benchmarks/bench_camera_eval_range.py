@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+__author__ = 'andyguo'
+
+import sys
+import time
+
+import numpy as np
+
+from dayu_file_format.camera.base import Camera
+from dayu_file_format.camera.config import TRANSFORM_CHANNELS, LENS_CHANNELS
+from dayu_file_format.curve import Curve
+
+
+def best_of(label, func, repeat=3):
+    seconds = []
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        seconds.append(time.time() - start)
+    print '{:<36} {:8.4f} s'.format(label, min(seconds))
+
+
+if __name__ == '__main__':
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    t = np.arange(1001, 1001 + frames, dtype=np.float64)
+    camera = Camera()
+    camera.transform_order, camera.rotation_order = 'srt', 'zxy'
+    for index, name in enumerate(TRANSFORM_CHANNELS + LENS_CHANNELS):
+        camera._set_channel(name, Curve.from_arrays(t, np.sin(t * 0.01 + index) + 1.5, left=[(-1, 0)] * frames,
+                                                    right=[(1, 0)] * frames, compact=True))
+
+    times = t + 0.5
+    print '{} frames, {} keys per channel'.format(len(times), frames)
+    best_of('eval per frame', lambda: [camera.eval(x) for x in times], repeat=1)
+    best_of('eval per frame, fields=translate', lambda: [camera.eval(x, fields=['translate']) for x in times],
+            repeat=1)
+    best_of('eval per frame, fields=focal', lambda: [camera.eval(x, fields=['focal']) for x in times], repeat=1)
+    best_of('eval_range', lambda: camera.eval_range(times))
+    best_of('eval_range, fields=focal', lambda: camera.eval_range(times, fields=['focal']))
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+__author__ = 'andyguo'
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from dayu_file_format.camera.base import Camera
+from dayu_file_format.camera.config import CHANNELS
+from dayu_file_format.curve import Curve
+
+
+def best_of(label, func, repeat=3):
+    seconds = []
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        seconds.append(time.time() - start)
+    print '{:<36} {:8.4f} s'.format(label, min(seconds))
+
+
+if __name__ == '__main__':
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    t = np.arange(1001, 1001 + frames, dtype=np.float64)
+    camera = Camera()
+    for index, name in enumerate(CHANNELS):
+        camera._set_channel(name, Curve.from_arrays(t, np.sin(t * 0.01 + index), left=[(-1, 0)] * frames,
+                                                    right=[(1, 0)] * frames))
+
+    folder = tempfile.mkdtemp()
+    cam_path = os.path.join(folder, 'baked.cam')
+    camera.save(cam_path)
+    print '{} frames, 34 channels, .cam {:.1f} KB'.format(frames, os.path.getsize(cam_path) / 1024.0)
+
+    best_of('load, read focal', lambda: Camera.load(cam_path).focal.eval(1050))
+    best_of('load lazy, read focal', lambda: Camera.load(cam_path, lazy=True).focal.eval(1050))
+    best_of('load channels=focal, read focal', lambda: Camera.load(cam_path, channels=['focal']).focal.eval(1050))
+    best_of('load lazy, read frame range', lambda: Camera.load(cam_path, lazy=True).start)
+    shutil.rmtree(folder)
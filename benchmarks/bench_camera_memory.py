@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+__author__ = 'andyguo'
+
+import gc
+import os
+import shutil
+import sys
+import tempfile
+
+from dayu_file_format.camera.base import Camera
+from dayu_file_format.curve import KeyFrame, Point2D
+
+
+def rss():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def measure(label, build, count):
+    gc.collect()
+    before = rss()
+    cameras = [build() for _ in xrange(count)]
+    gc.collect()
+    print '{:<36} {:8.0f} bytes per camera'.format(label, (rss() - before) / float(count))
+    return cameras
+
+
+def keyed_camera():
+    camera = Camera()
+    camera.focal.add(KeyFrame(Point2D(1001, 35.0)))
+    return camera
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    empty = measure('Camera()', Camera, count)
+    keyed = measure('Camera() with one keyed channel', keyed_camera, count)
+
+    folder = tempfile.mkdtemp()
+    try:
+        for ext in ('cam', 'bcam'):
+            path = os.path.join(folder, 'keyed.' + ext)
+            keyed_camera().save(path)
+            loaded = measure('Camera.load() of a keyed .{}'.format(ext), lambda: Camera.load(path), count)
+            del loaded
+    finally:
+        shutil.rmtree(folder)
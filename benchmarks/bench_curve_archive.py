@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+__author__ = 'andyguo'
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from dayu_file_format.curve import Curve, CurveArchive
+
+
+def timed(label, func):
+    start = time.time()
+    result = func()
+    print '{:<36} {:8.3f} s'.format(label, time.time() - start)
+    return result
+
+
+def pack(path, curves):
+    with CurveArchive(path, 'w') as archive:
+        for name, curve in curves:
+            archive.add(name, curve)
+
+
+def read_random(path, names):
+    with CurveArchive(path) as archive:
+        for name in names:
+            archive.load(name)
+
+
+def read_files(folder, names):
+    for name in names:
+        Curve.load(os.path.join(folder, name + '.bcurve'))
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    t = np.arange(24, dtype=np.float64)
+    curve = Curve.from_arrays(t, np.sin(t))
+    curves = [('prop_{:06d}.tx'.format(i), curve) for i in xrange(count)]
+    sample = random.sample([name for name, _ in curves], min(1000, count))
+
+    folder = tempfile.mkdtemp()
+    path = os.path.join(folder, 'shot.bca')
+    timed('pack {} curves'.format(count), lambda: pack(path, curves))
+    timed('open archive', lambda: CurveArchive(path).close())
+    timed('load {} random curves'.format(len(sample)), lambda: read_random(path, sample))
+
+    timed('save {} .bcurve files'.format(len(sample)),
+          lambda: [curve.save(os.path.join(folder, name + '.bcurve'), bcurve_version=2) for name in sample])
+    timed('load {} .bcurve files'.format(len(sample)), lambda: read_files(folder, sample))
+    shutil.rmtree(folder)
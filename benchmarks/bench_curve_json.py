@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+__author__ = 'andyguo'
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from dayu_file_format.curve import Curve, CurveReader, KeyFrame, Point2D
+
+
+def legacy_load(file_path):
+    curve = Curve()
+    with open(file_path, 'r') as jf:
+        data = json.load(jf)
+        curve.extra_data = data['global']
+        curve.extend(KeyFrame(Point2D(*k[0]), Point2D(*k[1]), Point2D(*k[2])) for k in data['keyframes'])
+    return curve
+
+
+def run(mode, file_path):
+    start = time.time()
+    if mode == 'legacy':
+        curve = legacy_load(file_path)
+    elif mode.startswith('reader'):
+        curve = CurveReader(file_path).read()
+    elif mode.startswith('from_dict'):
+        with open(file_path, 'r') as jf:
+            curve = Curve.from_dict(json.load(jf), compact=True)
+    else:
+        curve = Curve.load(file_path)
+    seconds = time.time() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    print '{:<28} {:8.3f} s  peak rss {:8.1f} MB  ({} keys)'.format(mode, seconds, peak, len(curve))
+
+
+def generate(count, path, columnar_path):
+    import numpy as np
+    t = np.arange(count, dtype=np.float64)
+    curve = Curve.from_arrays(t, np.sin(t * 0.01), left=[(-1, 0)] * count, right=[(1, 0)] * count)
+    curve.save(path)
+    curve.save(columnar_path, json_columnar=True)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 3:
+        generate(int(sys.argv[1]), sys.argv[2], sys.argv[3])
+        sys.exit(0)
+    if len(sys.argv) > 2:
+        run(sys.argv[1], sys.argv[2])
+        sys.exit(0)
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    folder = tempfile.mkdtemp()
+    path = os.path.join(folder, 'rows.curve')
+    columnar_path = os.path.join(folder, 'columnar.curve')
+    subprocess.check_call([sys.executable, __file__, str(count), path, columnar_path])
+    print '{} keys, {:.1f} MB rows, {:.1f} MB columnar'.format(count, os.path.getsize(path) / 1e6,
+                                                               os.path.getsize(columnar_path) / 1e6)
+    for mode, file_path in (('legacy', path), ('reader', path), ('Curve.load', path),
+                            ('reader, columnar', columnar_path), ('from_dict, columnar', columnar_path),
+                            ('Curve.load, columnar', columnar_path)):
+        subprocess.check_call([sys.executable, __file__, mode, file_path])
+    os.remove(path)
+    os.remove(columnar_path)
@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+__author__ = 'andyguo'
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from dayu_file_format.curve import Curve
+
+
+def timed(label, func):
+    start = time.time()
+    func()
+    print '{:<36} {:8.3f} s'.format(label, time.time() - start)
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    t = np.arange(1001, 3001, dtype=np.float64)
+    curve = Curve.from_arrays(t, np.sin(t * 0.01), left=[(-1, 0)] * len(t), right=[(1, 0)] * len(t))
+    folder = tempfile.mkdtemp()
+    paths = [os.path.join(folder, '{}.curve'.format(i)) for i in xrange(count)]
+    for path in paths:
+        curve.save(path)
+
+    timed('sequential load x{}'.format(count), lambda: [Curve.load(p, compact=True) for p in paths])
+    for executor in ('thread', 'process'):
+        timed('load_many {} x{}, {} workers'.format(executor, count, workers),
+              lambda: Curve.load_many(paths, workers=workers, executor=executor, compact=True))
+    shutil.rmtree(folder)
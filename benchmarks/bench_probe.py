@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+__author__ = 'andyguo'
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from dayu_file_format.curve import Curve
+
+
+def timed(label, func):
+    start = time.time()
+    func()
+    print '{:<36} {:8.3f} s'.format(label, time.time() - start)
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    keys = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    t = np.arange(1001, 1001 + keys, dtype=np.float64)
+    curve = Curve.from_arrays(t, np.sin(t * 0.01), left=[(-1, 0)] * keys, right=[(1, 0)] * keys)
+    folder = tempfile.mkdtemp()
+    for label, extension, kwargs in (('curve', 'curve', {}), ('bcurve v0.1', 'bcurve', {}),
+                                     ('bcurve v2', 'bcurve', {'version': 2})):
+        paths = [os.path.join(folder, '{}.{}'.format(i, extension)) for i in xrange(count)]
+        for path in paths:
+            curve.save(path, name='bench', **kwargs)
+        timed('probe {} x{}'.format(label, count), lambda: [Curve.probe(p) for p in paths])
+        timed('load {} x{}'.format(label, count), lambda: [Curve.load(p, compact=True) for p in paths])
+    shutil.rmtree(folder)
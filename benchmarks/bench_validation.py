@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+__author__ = 'andyguo'
+
+import inspect
+import timeit
+from functools import wraps
+from numbers import Number
+
+from dayu_file_format import deco
+from dayu_file_format.curve import Point2D
+from dayu_file_format.lina.matrix import Matrix_44f
+
+
+def legacy_data_type_validation(**validation):
+    def outter_wrapper(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            call_args = inspect.getcallargs(func, *args, **kwargs)
+            call_args.pop(inspect.getargspec(func).args[0], None)
+            for k, v in call_args.items():
+                if validation.has_key(k) and (not isinstance(v, validation.get(k))):
+                    raise ValueError('{} except type: {}'.format(k, validation.get(k)))
+
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    return outter_wrapper
+
+
+class LegacyPoint2D(object):
+    __slots__ = ['x', 'y']
+
+    @legacy_data_type_validation(x=Number, y=Number)
+    def __init__(self, x, y):
+        self.x = float(x)
+        self.y = float(y)
+
+
+class PlainPoint2D(object):
+    __slots__ = ['x', 'y']
+
+    def __init__(self, x, y):
+        self.x = float(x)
+        self.y = float(y)
+
+
+def bench(label, stmt, number=200000):
+    seconds = min(timeit.repeat(stmt, number=number, repeat=3))
+    print '{:<32} {:8.3f} us/call'.format(label, seconds / number * 1e6)
+    return seconds
+
+
+if __name__ == '__main__':
+    legacy = bench('legacy Point2D', lambda: LegacyPoint2D(1.0, 2.0))
+    current = bench('precompiled Point2D', lambda: Point2D(1.0, 2.0))
+    deco.set_validation(False)
+    switched_off = bench('Point2D, validation off', lambda: Point2D(1.0, 2.0))
+    deco.set_validation(True)
+    undecorated = bench('undecorated Point2D', lambda: PlainPoint2D(1.0, 2.0))
+    print 'speedup precompiled: {:.1f}x, validation off: {:.1f}x'.format(legacy / current, legacy / switched_off)
+
+    bench('Matrix_44f.compose', lambda: Matrix_44f.compose(1, 2, 3, 10, 20, 30), number=500)
+    deco.set_validation(False)
+    bench('Matrix_44f.compose, off', lambda: Matrix_44f.compose(1, 2, 3, 10, 20, 30), number=500)
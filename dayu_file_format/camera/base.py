@@ -5,7 +5,8 @@ __author__ = 'andyguo'
 
 from dayu_file_format.curve import Point2D, KeyFrame, Curve
 from dayu_file_format.lina.matrix import Matrix_44f
-from config import UNIT_SCALE
+from config import UNIT_SCALE, TRANSFORM_CHANNELS, LENS_CHANNELS, MATRIX_CHANNELS, CHANNELS, STEREO_CHANNELS, \
+    CHANNEL_DEFAULTS, FIELDS, FIELD_CHANNELS
 from mixin import SaveLoadMixin
 from deco import data_type_validation
 
@@ -48,7 +49,77 @@ class CameraKeyFrame(object):
                              self.fstop, self.near, self.far, self.pan, self.zoom, self.matrix)
 
 
+def _read_only(*args, **kwargs):
+    raise TypeError('empty camera channels are shared, assign a Curve to the camera channel instead')
+
+
+class ReadOnlyDict(dict):
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _read_only
+
+
+class EmptyCurve(Curve):
+    def __init__(self):
+        super(EmptyCurve, self).__init__()
+        self.extra_data = ReadOnlyDict()
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if self.__dict__.get('_frozen'):
+            _read_only()
+        super(EmptyCurve, self).__setattr__(name, value)
+
+    def to_dict(self, json_columnar=False, **kwargs):
+        return Curve().to_dict(json_columnar=json_columnar, **kwargs)
+
+    add = extend = pop = remove = clear = _replace_keyframes = _reorder = _read_only
+
+
+EMPTY_CURVE = EmptyCurve()
+
+
+def new_matrix():
+    return [[Curve(), Curve(), Curve(), Curve()],
+            [Curve(), Curve(), Curve(), Curve()],
+            [Curve(), Curve(), Curve(), Curve()],
+            [Curve(), Curve(), Curve(), Curve()]]
+
+
+class LazyChannel(object):
+    def __init__(self, name, factory=Curve):
+        self.name = name
+        self.factory = factory
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        loader = instance._lazy_channels.pop(self.name, None)
+        value = loader() if loader else self.factory()
+        setattr(instance, self.name, value)
+        return value
+
+
 class Camera(SaveLoadMixin):
+    _channels = CHANNELS
+    x = LazyChannel('x')
+    y = LazyChannel('y')
+    z = LazyChannel('z')
+    rx = LazyChannel('rx')
+    ry = LazyChannel('ry')
+    rz = LazyChannel('rz')
+    sx = LazyChannel('sx')
+    sy = LazyChannel('sy')
+    sz = LazyChannel('sz')
+    focal = LazyChannel('focal')
+    focus = LazyChannel('focus')
+    fstop = LazyChannel('fstop')
+    near = LazyChannel('near')
+    far = LazyChannel('far')
+    pan_x = LazyChannel('pan_x')
+    pan_y = LazyChannel('pan_y')
+    zoom_x = LazyChannel('zoom_x')
+    zoom_y = LazyChannel('zoom_y')
+    matrix = LazyChannel('matrix', factory=new_matrix)
+
     def __init__(self):
         self.name = 'main'
         self.type = 'generic'
@@ -63,102 +134,146 @@ class Camera(SaveLoadMixin):
         self.plate = ''
         self.start = 1001
         self.end = 1100
-        self.x = Curve()
-        self.y = Curve()
-        self.z = Curve()
-        self.rx = Curve()
-        self.ry = Curve()
-        self.rz = Curve()
-        self.sx = Curve()
-        self.sy = Curve()
-        self.sz = Curve()
-        self.focal = Curve()
-        self.focus = Curve()
-        self.fstop = Curve()
-        self.near = Curve()
-        self.far = Curve()
-        self.pan_x = Curve()
-        self.pan_y = Curve()
-        self.zoom_x = Curve()
-        self.zoom_y = Curve()
         self.transform_order = 'srt'
         self.rotation_order = 'xyz'
-        self.matrix = [[Curve(), Curve(), Curve(), Curve()],
-                       [Curve(), Curve(), Curve(), Curve()],
-                       [Curve(), Curve(), Curve(), Curve()],
-                       [Curve(), Curve(), Curve(), Curve()]]
         self.extra_data = {}
+        self._lazy_channels = {}
 
-    def eval(self, time, method=None, unit=None, use_matrix=False):
+    def eval(self, time, method=None, unit=None, use_matrix=False, fields=None):
         unit = unit if unit else self.unit
         unit_factor = pow(10.0, UNIT_SCALE.index(self.unit) - UNIT_SCALE.index(unit))
+        channel_method = method if method else self._get_channel('x').method
+        fields = self._check_fields(fields)
 
-        focal = self.focal.eval(time, method=method if method else self.x.method)
-        focus = self.focus.eval(time, method=method if method else self.x.method)
-        fstop = self.fstop.eval(time, method=method if method else self.x.method)
-        near = self.near.eval(time, method=method if method else self.x.method)
-        far = self.far.eval(time, method=method if method else self.x.method)
-        pan_x = self.pan_x.eval(time, method=method if method else self.x.method)
-        pan_y = self.pan_y.eval(time, method=method if method else self.x.method)
-        zoom_x = self.zoom_x.eval(time, method=method if method else self.x.method)
-        zoom_y = self.zoom_y.eval(time, method=method if method else self.x.method)
+        frame = CameraKeyFrame(time)
+        for field in ('focal', 'focus', 'fstop', 'near', 'far', 'pan', 'zoom'):
+            if field in fields:
+                values = tuple(self._eval_channel(name, time, channel_method) for name in FIELD_CHANNELS[field])
+                setattr(frame, field, values if len(values) > 1 else values[0])
 
+        srt_fields = fields.intersection(('translate', 'rotate', 'scale'))
         if use_matrix:
-            a00 = self.matrix[0][0].eval(time, method=method if method else self.matrix[0][0].method)
-            a01 = self.matrix[0][1].eval(time, method=method if method else self.matrix[0][1].method)
-            a02 = self.matrix[0][2].eval(time, method=method if method else self.matrix[0][2].method)
-            a03 = self.matrix[0][3].eval(time, method=method if method else self.matrix[0][3].method)
-            a10 = self.matrix[1][0].eval(time, method=method if method else self.matrix[1][0].method)
-            a11 = self.matrix[1][1].eval(time, method=method if method else self.matrix[1][1].method)
-            a12 = self.matrix[1][2].eval(time, method=method if method else self.matrix[1][2].method)
-            a13 = self.matrix[1][3].eval(time, method=method if method else self.matrix[1][3].method)
-            a20 = self.matrix[2][0].eval(time, method=method if method else self.matrix[2][0].method)
-            a21 = self.matrix[2][1].eval(time, method=method if method else self.matrix[2][1].method)
-            a22 = self.matrix[2][2].eval(time, method=method if method else self.matrix[2][2].method)
-            a23 = self.matrix[2][3].eval(time, method=method if method else self.matrix[2][3].method)
-            a30 = self.matrix[3][0].eval(time, method=method if method else self.matrix[3][0].method)
-            a31 = self.matrix[3][1].eval(time, method=method if method else self.matrix[3][1].method)
-            a32 = self.matrix[3][2].eval(time, method=method if method else self.matrix[3][2].method)
-            a33 = self.matrix[3][3].eval(time, method=method if method else self.matrix[3][3].method)
-            m44 = Matrix_44f(a00, a01, a02, a03,
-                             a10, a11, a12, a13,
-                             a20, a21, a22, a23,
-                             a30, a31, a32, a33)
-            srt_component = m44.decompose(transform_order=self.transform_order,
-                                          rotation_order=self.rotation_order)
-            return CameraKeyFrame(time, srt_component['translate'],
-                                  srt_component['rorate'], srt_component['scale'], m44,
-                                  focus, focal, near, far, fstop, (pan_x, pan_y), (zoom_x, zoom_y))
+            if srt_fields or 'matrix' in fields:
+                m44 = Matrix_44f(*(self._eval_channel(name, time, method) for name in MATRIX_CHANNELS))
+                for row in range(3):
+                    m44[row][3] *= unit_factor
+                if 'matrix' in fields:
+                    frame.matrix = m44
+                if srt_fields:
+                    srt_component = m44.decompose(transform_order=self.transform_order,
+                                                  rotation_order=self.rotation_order)
+                    for field in srt_fields:
+                        setattr(frame, field, srt_component[field])
 
         else:
-            x = self.x.eval(time, method=method if method else self.x.method)
-            y = self.y.eval(time, method=method if method else self.x.method)
-            z = self.z.eval(time, method=method if method else self.x.method)
-            rx = self.rx.eval(time, method=method if method else self.x.method)
-            ry = self.ry.eval(time, method=method if method else self.x.method)
-            rz = self.rz.eval(time, method=method if method else self.x.method)
-            sx = self.sx.eval(time, method=method if method else self.x.method)
-            sy = self.sy.eval(time, method=method if method else self.x.method)
-            sz = self.sz.eval(time, method=method if method else self.x.method)
-            m44 = Matrix_44f.compose(x, y, z, rx, ry, rz, sx, sy, sz,
-                                     transform_order=self.transform_order, rotation_order=self.rotation_order)
-            return CameraKeyFrame(time, (x, y, z), (rx, ry, rz), (sx, sy, sz), m44,
-                                  focus, focal, near, far, fstop, (pan_x, pan_y), (zoom_x, zoom_y))
+            if 'matrix' in fields:
+                srt_fields.update(('translate', 'rotate', 'scale'))
+            for field in srt_fields:
+                setattr(frame, field,
+                        tuple(self._eval_channel(name, time, channel_method) for name in FIELD_CHANNELS[field]))
+            if 'translate' in srt_fields:
+                frame.translate = tuple(value * unit_factor for value in frame.translate)
+            if 'matrix' in fields:
+                frame.matrix = Matrix_44f.compose(*(frame.translate + frame.rotate + frame.scale),
+                                                  transform_order=self.transform_order,
+                                                  rotation_order=self.rotation_order)
+            for field in srt_fields.difference(fields):
+                setattr(frame, field, None)
+        return frame
+
+    @staticmethod
+    def _check_fields(fields):
+        if fields is None:
+            return set(FIELDS)
+        fields = set([fields] if isinstance(fields, basestring) else fields)
+        unknown = fields.difference(FIELDS)
+        if unknown:
+            raise ValueError('unknown camera fields: {}'.format(', '.join(sorted(unknown))))
+        return fields
+
+    def _eval_channel(self, name, time, method=None):
+        curve = self._get_channel(name)
+        if not len(curve):
+            return CHANNEL_DEFAULTS.get(name)
+        return curve.eval(time, method=method if method else curve.method)
+
+    def _eval_channel_many(self, name, times, method=None):
+        import numpy as np
+        curve = self._get_channel(name)
+        if not len(curve):
+            return np.full(len(times), CHANNEL_DEFAULTS.get(name, np.nan))
+        return curve.eval_many(times, method=method if method else curve.method)
+
+    def eval_range(self, times, method=None, unit=None, use_matrix=False, fields=None):
+        import numpy as np
+        unit = unit if unit else self.unit
+        unit_factor = pow(10.0, UNIT_SCALE.index(self.unit) - UNIT_SCALE.index(unit))
+        times = np.array(times, dtype=np.float64, ndmin=1)
+        method = method if method else self._get_channel('x').method
+        fields = self._check_fields(fields)
+
+        result = {'time': times}
+        for name in LENS_CHANNELS if use_matrix else TRANSFORM_CHANNELS + LENS_CHANNELS:
+            if any(name in FIELD_CHANNELS[field] for field in fields):
+                result[name] = self._eval_channel_many(name, times, method)
+
+        srt_fields = fields.intersection(('translate', 'rotate', 'scale'))
+        if use_matrix:
+            if srt_fields or 'matrix' in fields:
+                matrix = np.empty((len(times), 4, 4))
+                for name in MATRIX_CHANNELS:
+                    matrix[:, int(name[1]), int(name[2])] = self._eval_channel_many(name, times, method)
+                matrix[:, :3, 3] *= unit_factor
+                if 'matrix' in fields:
+                    result['matrix'] = matrix
+                if srt_fields:
+                    srt_component = Matrix_44f.decompose_many(matrix, transform_order=self.transform_order,
+                                                              rotation_order=self.rotation_order)
+                    for field in srt_fields:
+                        result.update(zip(FIELD_CHANNELS[field], srt_component[field]))
+            return result
+
+        for name in ('x', 'y', 'z'):
+            if name in result:
+                result[name] = result[name] * unit_factor
+
+        if 'matrix' in fields:
+            result['matrix'] = Matrix_44f.compose_many(*(result[name] for name in TRANSFORM_CHANNELS),
+                                                       transform_order=self.transform_order,
+                                                       rotation_order=self.rotation_order)
+            for field in set(('translate', 'rotate', 'scale')).difference(srt_fields):
+                for name in FIELD_CHANNELS[field]:
+                    del result[name]
+        return result
 
     @property
     def duration(self):
         return self.end - self.start
 
+    def _get_channel(self, name):
+        if name in MATRIX_CHANNELS:
+            if 'matrix' not in self.__dict__ and 'matrix' not in self._lazy_channels:
+                return EMPTY_CURVE
+            return self.matrix[int(name[1])][int(name[2])]
+        if name not in self.__dict__ and name not in self._lazy_channels:
+            return EMPTY_CURVE
+        return getattr(self, name)
+
+    def _set_channel(self, name, curve):
+        if name in MATRIX_CHANNELS:
+            self.matrix[int(name[1])][int(name[2])] = curve
+        else:
+            setattr(self, name, curve)
+
 
 class StereoCamera(Camera):
-    def __init__(self):
-        super(StereoCamera, self).__init__()
-        self.inter_axial = Curve()
-        self.left_inter_axial = Curve()
-        self.right_inter_axial = Curve()
-        self.inter_toe = Curve()
-        self.left_inter_toe = Curve()
-        self.right_inter_axial = Curve()
+    _channels = CHANNELS + STEREO_CHANNELS
+    inter_axial = LazyChannel('inter_axial')
+    left_inter_axial = LazyChannel('left_inter_axial')
+    right_inter_axial = LazyChannel('right_inter_axial')
+    inter_toe = LazyChannel('inter_toe')
+    left_inter_toe = LazyChannel('left_inter_toe')
+    right_inter_toe = LazyChannel('right_inter_toe')
 
     @property
     def main_camera(self):
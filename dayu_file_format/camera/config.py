@@ -4,3 +4,29 @@
 __author__ = 'andyguo'
 
 UNIT_SCALE = ('mm', 'cm', 'dm', 'm', '10m', '100m', 'km')
+
+GLOBAL_ATTRIBUTES = ('name', 'type', 'app', 'unit', 'fps', 'shutter', 'distort', 'undistort', 'ccd', 'resolution',
+                     'plate', 'start', 'end', 'transform_order', 'rotation_order')
+TRANSFORM_CHANNELS = ('x', 'y', 'z', 'rx', 'ry', 'rz', 'sx', 'sy', 'sz')
+LENS_CHANNELS = ('focal', 'focus', 'fstop', 'near', 'far', 'pan_x', 'pan_y', 'zoom_x', 'zoom_y')
+MATRIX_CHANNELS = tuple('a{}{}'.format(row, column) for row in range(4) for column in range(4))
+CHANNELS = TRANSFORM_CHANNELS + LENS_CHANNELS + MATRIX_CHANNELS
+STEREO_CHANNELS = ('inter_axial', 'left_inter_axial', 'right_inter_axial',
+                   'inter_toe', 'left_inter_toe', 'right_inter_toe')
+
+CHANNEL_DEFAULTS = dict([(name, 0.0) for name in TRANSFORM_CHANNELS] +
+                        [('sx', 1.0), ('sy', 1.0), ('sz', 1.0)] +
+                        [(name, 1.0 if name[1] == name[2] else 0.0) for name in MATRIX_CHANNELS])
+
+FIELDS = ('translate', 'rotate', 'scale', 'matrix', 'focus', 'focal', 'near', 'far', 'fstop', 'pan', 'zoom')
+FIELD_CHANNELS = {'translate': ('x', 'y', 'z'),
+                  'rotate'   : ('rx', 'ry', 'rz'),
+                  'scale'    : ('sx', 'sy', 'sz'),
+                  'matrix'   : TRANSFORM_CHANNELS,
+                  'focus'    : ('focus',),
+                  'focal'    : ('focal',),
+                  'near'     : ('near',),
+                  'far'      : ('far',),
+                  'fstop'    : ('fstop',),
+                  'pan'      : ('pan_x', 'pan_y'),
+                  'zoom'     : ('zoom_x', 'zoom_y')}
@@ -3,11 +3,39 @@
 
 __author__ = 'andyguo'
 
+import struct
+
+
+def _load_dict_channel(data, compact=False):
+    from dayu_file_format.curve import Curve
+    return Curve.from_dict(data, compact=compact)
+
+
+def _has_keyframes(data):
+    if 'keyframes_v2' in data:
+        return any(data['keyframes_v2'].itervalues())
+    return bool(data.get('keyframes'))
+
+
+def _load_binary_channel(buf, compact=False):
+    from dayu_file_format.curve import Curve
+    curve = Curve(compact=compact)
+    curve._load_binary_buffer(buf)
+    return curve
+
+
+def _load_matrix(loaders):
+    from dayu_file_format.curve import Curve
+    return [[loaders['a{}{}'.format(row, column)]() if 'a{}{}'.format(row, column) in loaders else Curve()
+             for column in range(4)]
+            for row in range(4)]
+
 
 class SaveLoadMixin(object):
     def save(self, file_path, **kwargs):
         if file_path.endswith('.bcam'):
-            pass
+            self._save_binary_file(file_path, **kwargs)
+            return
 
         if file_path.endswith('.cam'):
             self._save_ascii_file(file_path, **kwargs)
@@ -34,46 +62,14 @@ class SaveLoadMixin(object):
             result['global']['transform_order'] = self.transform_order
             result['global']['rotation_order'] = self.rotation_order
 
-            result['channels']['x'] = self.x.to_dict()
-            result['channels']['y'] = self.y.to_dict()
-            result['channels']['z'] = self.z.to_dict()
-            result['channels']['rx'] = self.rx.to_dict()
-            result['channels']['ry'] = self.ry.to_dict()
-            result['channels']['rz'] = self.rz.to_dict()
-            result['channels']['sx'] = self.sx.to_dict()
-            result['channels']['sy'] = self.sy.to_dict()
-            result['channels']['sz'] = self.sz.to_dict()
-            result['channels']['focal'] = self.focal.to_dict()
-            result['channels']['focus'] = self.focus.to_dict()
-            result['channels']['fstop'] = self.fstop.to_dict()
-            result['channels']['near'] = self.near.to_dict()
-            result['channels']['far'] = self.far.to_dict()
-            result['channels']['pan_x'] = self.pan_x.to_dict()
-            result['channels']['pan_y'] = self.pan_y.to_dict()
-            result['channels']['zoom_x'] = self.zoom_x.to_dict()
-            result['channels']['zoom_y'] = self.zoom_y.to_dict()
-            result['channels']['a00'] = self.matrix[0][0].to_dict()
-            result['channels']['a01'] = self.matrix[0][1].to_dict()
-            result['channels']['a02'] = self.matrix[0][2].to_dict()
-            result['channels']['a03'] = self.matrix[0][3].to_dict()
-            result['channels']['a10'] = self.matrix[1][0].to_dict()
-            result['channels']['a11'] = self.matrix[1][1].to_dict()
-            result['channels']['a12'] = self.matrix[1][2].to_dict()
-            result['channels']['a13'] = self.matrix[1][3].to_dict()
-            result['channels']['a20'] = self.matrix[2][0].to_dict()
-            result['channels']['a21'] = self.matrix[2][1].to_dict()
-            result['channels']['a22'] = self.matrix[2][2].to_dict()
-            result['channels']['a23'] = self.matrix[2][3].to_dict()
-            result['channels']['a30'] = self.matrix[3][0].to_dict()
-            result['channels']['a31'] = self.matrix[3][1].to_dict()
-            result['channels']['a32'] = self.matrix[3][2].to_dict()
-            result['channels']['a33'] = self.matrix[3][3].to_dict()
+            for name in self._channels:
+                result['channels'][name] = self._get_channel(name).to_dict()
 
             json.dump(result, jf)
 
-    def _load_ascii_file(self, file_path):
+    def _load_ascii_file(self, file_path, compact=False, lazy=False, channels=None):
         import json
-        from base import Curve
+        from functools import partial
         json_data = None
         with open(file_path, 'r') as jf:
             json_data = json.load(jf)
@@ -95,53 +91,159 @@ class SaveLoadMixin(object):
         self.rotation_order = json_data['global'].pop('rotation_order')
         self.extra_data = dict(json_data['global'])
 
-        self.x = Curve.from_dict(json_data['channels'].pop('x'))
-        self.y = Curve.from_dict(json_data['channels'].pop('y'))
-        self.z = Curve.from_dict(json_data['channels'].pop('z'))
-        self.rx = Curve.from_dict(json_data['channels'].pop('rx'))
-        self.ry = Curve.from_dict(json_data['channels'].pop('ry'))
-        self.rz = Curve.from_dict(json_data['channels'].pop('rz'))
-        self.sx = Curve.from_dict(json_data['channels'].pop('sx'))
-        self.sy = Curve.from_dict(json_data['channels'].pop('sy'))
-        self.sz = Curve.from_dict(json_data['channels'].pop('sz'))
-        self.focal = Curve.from_dict(json_data['channels'].pop('focal'))
-        self.focus = Curve.from_dict(json_data['channels'].pop('focus'))
-        self.fstop = Curve.from_dict(json_data['channels'].pop('fstop'))
-        self.near = Curve.from_dict(json_data['channels'].pop('near'))
-        self.far = Curve.from_dict(json_data['channels'].pop('far'))
-        self.pan_x = Curve.from_dict(json_data['channels'].pop('pan_x'))
-        self.pan_y = Curve.from_dict(json_data['channels'].pop('pan_y'))
-        self.zoom_x = Curve.from_dict(json_data['channels'].pop('zoom_x'))
-        self.zoom_y = Curve.from_dict(json_data['channels'].pop('zoom_y'))
-        a00 = Curve.from_dict(json_data['channels'].pop('a00'))
-        a01 = Curve.from_dict(json_data['channels'].pop('a01'))
-        a02 = Curve.from_dict(json_data['channels'].pop('a02'))
-        a03 = Curve.from_dict(json_data['channels'].pop('a03'))
-        a10 = Curve.from_dict(json_data['channels'].pop('a10'))
-        a11 = Curve.from_dict(json_data['channels'].pop('a11'))
-        a12 = Curve.from_dict(json_data['channels'].pop('a12'))
-        a13 = Curve.from_dict(json_data['channels'].pop('a13'))
-        a20 = Curve.from_dict(json_data['channels'].pop('a20'))
-        a21 = Curve.from_dict(json_data['channels'].pop('a21'))
-        a22 = Curve.from_dict(json_data['channels'].pop('a22'))
-        a23 = Curve.from_dict(json_data['channels'].pop('a23'))
-        a30 = Curve.from_dict(json_data['channels'].pop('a30'))
-        a31 = Curve.from_dict(json_data['channels'].pop('a31'))
-        a32 = Curve.from_dict(json_data['channels'].pop('a32'))
-        a33 = Curve.from_dict(json_data['channels'].pop('a33'))
-        self.matrix = [[a00, a01, a02, a03],
-                       [a10, a11, a12, a13],
-                       [a20, a21, a22, a23],
-                       [a30, a31, a32, a33]]
-
+        self._load_channels(dict((name, partial(_load_dict_channel, data, compact=compact))
+                                 for name, data in json_data['channels'].iteritems() if _has_keyframes(data)),
+                            lazy=lazy, channels=channels)
         return True
 
+    def _load_channels(self, loaders, lazy=False, channels=None):
+        from functools import partial
+        from config import MATRIX_CHANNELS
+        if channels is not None:
+            channels = set([channels] if isinstance(channels, basestring) else channels)
+            unknown = channels.difference(self._channels)
+            if unknown:
+                raise ValueError('unknown camera channels: {}'.format(', '.join(sorted(unknown))))
+            loaders = dict((name, loader) for name, loader in loaders.iteritems() if name in channels)
+
+        matrix_loaders = dict((name, loaders.pop(name)) for name in MATRIX_CHANNELS if name in loaders)
+        if matrix_loaders:
+            loaders['matrix'] = partial(_load_matrix, matrix_loaders)
+
+        for name, loader in loaders.iteritems():
+            if name not in self._channels and name != 'matrix':
+                continue
+            if lazy:
+                self.__dict__.pop(name, None)
+                self._lazy_channels[name] = loader
+            else:
+                setattr(self, name, loader())
+
+    def _save_binary_file(self, file_path, **kwargs):
+        import json
+        from cStringIO import StringIO
+        from config import GLOBAL_ATTRIBUTES
+        from dayu_file_format.curve.archive import TOC_ENTRY_FORMAT
+        from dayu_file_format.curve.config import byte_order_marks, native_byte_order
+
+        global_data = dict(self.extra_data)
+        global_data.update(kwargs)
+        global_data.update((k, getattr(self, k)) for k in GLOBAL_ATTRIBUTES)
+        global_data = json.dumps(global_data)
+
+        channels = []
+        for name in self._channels:
+            curve = self._get_channel(name)
+            if len(curve):
+                data = StringIO()
+                curve._write_binary(data, bcurve_version=2)
+                channels.append((name, data.getvalue()))
+
+        toc_size = 8 + 4 + sum(struct.calcsize(TOC_ENTRY_FORMAT) + len(name) for name, _ in channels)
+        offset = 16 + 8 + len(global_data) + toc_size
+        toc = [struct.pack('>I 4s I', toc_size, 'ctoc', len(channels))]
+        for name, data in channels:
+            toc.append(struct.pack(TOC_ENTRY_FORMAT, offset + 8, len(data), len(name)) + name)
+            offset += 8 + len(data)
+
+        with open(file_path, 'wb') as bf:
+            bf.write(struct.pack('>4s 2h 2s 6x', 'bcam', 0x0000, 0x0001, byte_order_marks[native_byte_order]))
+            bf.write(struct.pack('>I 4s', 8 + len(global_data), 'cglb'))
+            bf.write(global_data)
+            bf.write(''.join(toc))
+            for name, data in channels:
+                bf.write(struct.pack('>I 4s', 8 + len(data), 'chan'))
+                bf.write(data)
+
     @classmethod
-    def load(cls, file_path):
+    def _read_binary_toc(cls, file_obj):
+        import json
+        from dayu_file_format.curve.archive import TOC_ENTRY_FORMAT
+        from dayu_file_format.curve.config import byte_order_prefix
+        magic, major_version, minor_version, byte_order_mark = struct.unpack('>4s 2h 2s 6x', file_obj.read(16))
+        if magic != 'bcam' or byte_order_mark not in byte_order_prefix:
+            raise ValueError('not a valid binary camera file!')
+
+        global_size, global_type = struct.unpack('>I 4s', file_obj.read(8))
+        global_data = json.loads(file_obj.read(global_size - 8))
+        toc_size, toc_type, count = struct.unpack('>I 4s I', file_obj.read(12))
+        if global_type != 'cglb' or toc_type != 'ctoc':
+            raise ValueError('not a valid binary camera file!')
+
+        data = file_obj.read(toc_size - 12)
+        channels = []
+        offset = 0
+        for _ in xrange(count):
+            channel_offset, channel_size, name_size = struct.unpack_from(TOC_ENTRY_FORMAT, data, offset)
+            offset += struct.calcsize(TOC_ENTRY_FORMAT)
+            channels.append((data[offset:offset + name_size], channel_offset, channel_size))
+            offset += name_size
+        return global_data, channels
+
+    def _load_binary_file(self, file_path, compact=False, lazy=False, channels=None):
+        from functools import partial
+        from config import GLOBAL_ATTRIBUTES
+        with open(file_path, 'rb') as bf:
+            global_data, toc = self._read_binary_toc(bf)
+            for key in GLOBAL_ATTRIBUTES:
+                setattr(self, key, global_data.pop(key))
+            self.extra_data = global_data
+            loaders = {}
+            for name, offset, size in toc:
+                if channels is None or name in channels:
+                    bf.seek(offset)
+                    loaders[name] = partial(_load_binary_channel, bf.read(size), compact=compact)
+        self._load_channels(loaders, lazy=lazy, channels=channels)
+
+    @classmethod
+    def load_many(cls, file_paths, workers=4, executor='thread', ordered=True, **kwargs):
+        from dayu_file_format.parallel import load_many
+        return load_many(cls, file_paths, workers=workers, executor=executor, ordered=ordered, **kwargs)
+
+    def _to_payload(self):
+        from config import GLOBAL_ATTRIBUTES
+        channels = [(name, self._get_channel(name)) for name in self._channels]
+        return (dict((k, getattr(self, k)) for k in GLOBAL_ATTRIBUTES), dict(self.extra_data),
+                [(name, curve._to_payload()) for name, curve in channels if len(curve)])
+
+    @classmethod
+    def _from_payload(cls, payload):
+        from dayu_file_format.curve import Curve
+        attributes, extra_data, channels = payload
+        instance = cls()
+        for key, value in attributes.iteritems():
+            setattr(instance, key, value)
+        instance.extra_data = extra_data
+        for name, channel in channels:
+            instance._set_channel(name, Curve._from_payload(channel))
+        return instance
+
+    @classmethod
+    def probe(cls, file_path):
+        if file_path.endswith('.cam'):
+            from dayu_file_format.curve.stream import CurveReader
+            return CurveReader(file_path).probe(channels_key='channels')
+
         if file_path.endswith('.bcam'):
-            pass
+            from dayu_file_format.curve import Curve
+            with open(file_path, 'rb') as bf:
+                global_data, channels = cls._read_binary_toc(bf)
+                return {'global'  : global_data,
+                        'channels': dict((name, Curve._probe_binary_file(bf, offset, offset + size))
+                                         for name, offset, size in channels)}
+
+        raise IOError(u'cannot probe {}'.format(file_path))
+
+    @classmethod
+    def load(cls, file_path, compact=False, lazy=False, channels=None):
+        if isinstance(channels, basestring):
+            channels = [channels]
+        if file_path.endswith('.bcam'):
+            instance = cls()
+            instance._load_binary_file(file_path, compact=compact, lazy=lazy, channels=channels)
+            return instance
 
         if file_path.endswith('.cam'):
             instance = cls()
-            instance._load_ascii_file(file_path)
+            instance._load_ascii_file(file_path, compact=compact, lazy=lazy, channels=channels)
             return instance
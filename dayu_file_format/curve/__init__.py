@@ -4,3 +4,5 @@
 __author__ = 'andyguo'
 
 from .base import Curve, Point2D, KeyFrame
+from .archive import CurveArchive
+from .stream import CurveReader, CurveWriter
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+__author__ = 'andyguo'
+
+import os
+import struct
+from collections import OrderedDict
+
+from base import Curve
+
+HEADER_FORMAT = '>4s 2h I 4s Q'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+TOC_ENTRY_FORMAT = '>Q I H'
+TOC_ENTRY_SIZE = struct.calcsize(TOC_ENTRY_FORMAT)
+
+
+class CurveArchive(object):
+    def __init__(self, file_path, mode='r'):
+        if mode not in ('r', 'w', 'a'):
+            raise ValueError('mode should be one of r, w, a')
+
+        self.file_path = file_path
+        self.mode = mode
+        self._toc = OrderedDict()
+        self._toc_size = 0
+        self._changed = False
+
+        if mode == 'w' or (mode == 'a' and not os.path.exists(file_path)):
+            self._file = open(file_path, 'w+b')
+            self._file.write(struct.pack(HEADER_FORMAT, 'carc', 0x0000, 0x0001, 16, 'tocp', 0))
+            self._end = HEADER_SIZE
+            self._changed = True
+        else:
+            self._file = open(file_path, 'rb' if mode == 'r' else 'r+b')
+            self._read_toc()
+
+    def _read_toc(self):
+        magic, major_version, minor_version, pointer_size, pointer_type, toc_offset = \
+            struct.unpack(HEADER_FORMAT, self._file.read(HEADER_SIZE))
+        if magic != 'carc' or pointer_type != 'tocp':
+            raise ValueError('not a valid curve archive!')
+
+        self._end = toc_offset or HEADER_SIZE
+        if not toc_offset:
+            return
+
+        self._file.seek(toc_offset)
+        atom_size, atom_type = struct.unpack('>I 4s', self._file.read(8))
+        data = self._file.read(atom_size - 8)
+        self._end = toc_offset + atom_size
+        self._toc_size = atom_size
+        count = struct.unpack_from('>I', data, 0)[0]
+        offset = 4
+        for _ in xrange(count):
+            curve_offset, curve_size, name_size = struct.unpack_from(TOC_ENTRY_FORMAT, data, offset)
+            offset += TOC_ENTRY_SIZE
+            self._toc[data[offset:offset + name_size]] = (curve_offset, curve_size)
+            offset += name_size
+
+    def _write_toc(self):
+        entries = [struct.pack(TOC_ENTRY_FORMAT, offset, size, len(name)) + name
+                   for name, (offset, size) in self._toc.iteritems()]
+        data = struct.pack('>I', len(entries)) + ''.join(entries)
+        self._file.seek(self._end)
+        self._file.write(struct.pack('>I 4s', 8 + len(data), 'ctoc'))
+        self._file.write(data)
+        self._file.truncate()
+        self._file.flush()
+        self._file.seek(16)
+        self._file.write(struct.pack('>Q', self._end))
+        self._toc_size = 8 + len(data)
+
+    def __len__(self):
+        return len(self._toc)
+
+    def __contains__(self, name):
+        return name in self._toc
+
+    def __iter__(self):
+        return iter(self._toc)
+
+    def names(self):
+        return self._toc.keys()
+
+    def load(self, name, compact=False):
+        if name not in self._toc:
+            raise KeyError(name)
+        offset, size = self._toc[name]
+        self._file.seek(offset)
+        curve = Curve(compact=compact)
+        curve._load_binary_buffer(self._file.read(size))
+        return curve
+
+    def add(self, curve_name, curve, bcurve_compress=False, bcurve_max_error=None, **kwargs):
+        from cStringIO import StringIO
+        if self.mode == 'r':
+            raise IOError(u'{} is opened read-only'.format(self.file_path))
+        if not isinstance(curve_name, str):
+            raise ValueError('curve name should be str')
+        if curve_name in self._toc:
+            raise ValueError('curve {} is already in the archive'.format(curve_name))
+
+        data = StringIO()
+        curve._write_binary(data, bcurve_version=2, bcurve_compress=bcurve_compress, bcurve_max_error=bcurve_max_error,
+                            **kwargs)
+        data = data.getvalue()
+        self._file.seek(self._end)
+        self._file.write(struct.pack('>I 4s', 8 + len(data), 'curv'))
+        self._file.write(data)
+        self._toc[curve_name] = (self._end + 8, len(data))
+        self._end += 8 + len(data)
+        self._changed = True
+
+    @property
+    def dead_bytes(self):
+        self._file.seek(0, os.SEEK_END)
+        used = HEADER_SIZE + self._toc_size + sum(8 + size for _, size in self._toc.itervalues())
+        return self._file.tell() - used
+
+    def repack(self):
+        if self.mode == 'r':
+            raise IOError(u'{} is opened read-only'.format(self.file_path))
+
+        temp_path = self.file_path + '.repack'
+        source, old_toc, old_end = self._file, self._toc, self._end
+        self._file = open(temp_path, 'w+b')
+        try:
+            self._file.write(struct.pack(HEADER_FORMAT, 'carc', 0x0000, 0x0001, 16, 'tocp', 0))
+            self._toc = OrderedDict()
+            self._end = HEADER_SIZE
+            for name, (offset, size) in old_toc.iteritems():
+                source.seek(offset)
+                self._file.write(struct.pack('>I 4s', 8 + size, 'curv'))
+                self._file.write(source.read(size))
+                self._toc[name] = (self._end + 8, size)
+                self._end += 8 + size
+            self._write_toc()
+            self._end += self._toc_size
+        except Exception:
+            self._file.close()
+            os.remove(temp_path)
+            self._file, self._toc, self._end = source, old_toc, old_end
+            raise
+        self._file.close()
+        source.close()
+
+        if os.name == 'nt':
+            os.remove(self.file_path)
+        os.rename(temp_path, self.file_path)
+        self._file = open(self.file_path, 'r+b')
+        self._changed = False
+
+    def close(self):
+        if self._file.closed:
+            return
+        if self._changed and self.mode != 'r':
+            self._write_toc()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -4,18 +4,21 @@
 __author__ = 'andyguo'
 
 import bisect
+from array import array
 from collections import Iterable
 
-from data_structure import data_type_validation, KeyFrame, Point2D
+from data_structure import data_type_validation, column_to_numpy, KeyFrame, KeyFrameColumns, Point2D
 from mixin import SaveLoadMixin, InterpolationMixin
 
 
 class Curve(SaveLoadMixin, InterpolationMixin):
-    def __init__(self):
+    def __init__(self, compact=False):
         super(Curve, self).__init__()
         self.method = 'cubic'
         self.extra_data = {}
-        self._keyframes = []
+        self._keyframes = KeyFrameColumns() if compact else []
+        self._times = self._keyframes.times if compact else array('d')
+        self._coefficients = {}
 
     def __len__(self):
         return len(self._keyframes)
@@ -28,6 +31,10 @@ class Curve(SaveLoadMixin, InterpolationMixin):
         for keyframe in self._keyframes:
             yield keyframe
 
+    @property
+    def compact(self):
+        return isinstance(self._keyframes, KeyFrameColumns)
+
     @property
     def duration(self):
         if self._keyframes:
@@ -36,39 +43,136 @@ class Curve(SaveLoadMixin, InterpolationMixin):
 
     @data_type_validation(keyframe=KeyFrame)
     def add(self, keyframe):
-        index = bisect.bisect([k.current.x for k in self], keyframe.current.x)
+        index = bisect.bisect(self._times, keyframe.current.x)
         self._keyframes.insert(index, keyframe)
+        if not self.compact:
+            self._times.insert(index, keyframe.current.x)
+        self._keyframes_changed()
 
     @data_type_validation(keyframes=Iterable)
     def extend(self, keyframes):
-        for k in keyframes:
-            self.add(k)
+        keyframes = list(keyframes)
+        if not all(isinstance(k, KeyFrame) for k in keyframes):
+            raise ValueError('keyframes except type: {}'.format(KeyFrame))
+        if not keyframes:
+            return
+
+        keyframes.sort(key=lambda k: k.current.x)
+        need_merge = len(self._keyframes) > 0 and keyframes[0].current.x < self._times[-1]
+        self._keyframes.extend(keyframes)
+        if self.compact:
+            self._times = self._keyframes.times
+        else:
+            self._times.extend(k.current.x for k in keyframes)
+        if need_merge:
+            self._reorder(sorted(xrange(len(self._times)), key=self._times.__getitem__))
+        self._keyframes_changed()
+
+    def _reorder(self, order):
+        if self.compact:
+            self._keyframes = self._keyframes.take(order)
+        else:
+            self._keyframes = [self._keyframes[i] for i in order]
+            self._times = array('d', (self._times[i] for i in order))
+
+    @classmethod
+    def from_arrays(cls, times, values, left=None, right=None, compact=False):
+        if len(times) != len(values):
+            raise ValueError('times and values should have the same length')
+        left = left if left is not None else [(0, 0)] * len(times)
+        right = right if right is not None else [(0, 0)] * len(times)
+        if len(left) != len(times) or len(right) != len(times):
+            raise ValueError('left and right should have one tangent per key')
+
+        columns = KeyFrameColumns((array('d', times), array('d', values),
+                                   array('d', (l[0] for l in left)), array('d', (l[1] for l in left)),
+                                   array('d', (r[0] for r in right)), array('d', (r[1] for r in right))))
+        return cls._from_columns(columns, compact=compact)
+
+    @classmethod
+    def _from_columns(cls, columns, compact=False):
+        curve = cls(compact=compact)
+        curve._replace_keyframes(cls._sorted_columns(columns))
+        return curve
+
+    @staticmethod
+    def _sorted_columns(columns):
+        times = columns.times
+        if any(times[i] > times[i + 1] for i in xrange(len(times) - 1)):
+            columns = columns.take(sorted(xrange(len(times)), key=times.__getitem__))
+        return columns
+
+    def _replace_keyframes(self, columns):
+        if self.compact:
+            self._keyframes = columns
+        else:
+            self._keyframes = list(columns)
+            self._times = array('d', columns.times)
+        self._keyframes_changed()
+
+    @classmethod
+    def from_numpy(cls, columns):
+        import numpy as np
+        if isinstance(columns, np.ndarray) and columns.ndim == 2:
+            columns = columns.T
+        columns = tuple(np.asarray(c, dtype=np.float64) for c in columns)
+        if len(columns) != 6:
+            raise ValueError('from_numpy needs six columns: x, y, left x, left y, right x, right y')
+
+        times = columns[0]
+        if len(times) > 1 and (np.diff(times) < 0).any():
+            order = np.argsort(times, kind='mergesort')
+            columns = tuple(c[order] for c in columns)
+
+        curve = cls(compact=True)
+        curve._keyframes = KeyFrameColumns(columns)
+        curve._keyframes_changed()
+        return curve
+
+    def to_numpy(self):
+        keyframes = self._keyframes if self.compact else KeyFrameColumns.from_keyframes(self._keyframes)
+        return tuple(column_to_numpy(c) for c in keyframes.columns)
 
     @data_type_validation(index=int)
     def pop(self, index=-1):
-        return self._keyframes.pop(index)
+        keyframe = self._keyframes.pop(index)
+        if not self.compact:
+            self._times.pop(index)
+        self._keyframes_changed()
+        return keyframe
 
     @data_type_validation(KeyFrame=KeyFrame)
     def remove(self, keyframe):
-        self._keyframes.remove(keyframe)
+        index = self._keyframes.index(keyframe)
+        del self._keyframes[index]
+        if not self.compact:
+            del self._times[index]
+        self._keyframes_changed()
 
     @data_type_validation(x=(int, float))
     def find_nearest_keyframe(self, x):
-        if x <= self[0].current.x:
+        if x <= self._times[0]:
             return self[0]
-        if x >= self[-1].current.x:
+        if x >= self._times[-1]:
             return self[-1]
 
-        index = bisect.bisect([k.current.x for k in self], x)
-        if (x - self[index - 1].current.x) <= (self[index].current.x - x):
+        index = bisect.bisect(self._times, x)
+        if (x - self._times[index - 1]) <= (self._times[index] - x):
             return self[index - 1]
         else:
             return self[index]
 
+    def _keyframes_changed(self):
+        self._coefficients = {}
+        if self.compact:
+            self._times = self._keyframes.times
+
     def clear(self):
         try:
             self.extra_data = {}
-            self._keyframes = []
+            self._keyframes = KeyFrameColumns() if self.compact else []
+            self._times = array('d')
+            self._keyframes_changed()
             return True
         except Exception as e:
             return False
@@ -3,6 +3,8 @@
 
 __author__ = 'andyguo'
 
+import sys
+
 pack_fmt_func = {str  : lambda v: '{}s'.format(len(v)),
                  int  : lambda v: 'i',
                  long : lambda v: 'l',
@@ -13,3 +15,16 @@ pack_fmt_code = {str  : 0x01,
                  float: 0x08}
 
 unpack_fmt_code = dict(zip(pack_fmt_code.values(), pack_fmt_code.keys()))
+
+native_byte_order = '<' if sys.byteorder == 'little' else '>'
+byte_order_marks = {'<': 'II',
+                    '>': 'MM'}
+byte_order_prefix = dict(zip(byte_order_marks.values(), byte_order_marks.keys()))
+
+time_index_block = 256
+
+quantized_dtypes = {8 : 'u1',
+                    16: '<u2',
+                    64: '<f8'}
+
+keyframe_columns = ('x', 'y', 'left_x', 'left_y', 'right_x', 'right_y')
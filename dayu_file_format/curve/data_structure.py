@@ -3,26 +3,12 @@
 
 __author__ = 'andyguo'
 
-import inspect
-from functools import wraps
+import struct
+from array import array
+from itertools import izip
 from numbers import Number
 
-
-def data_type_validation(**validation):
-    def outter_wrapper(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            call_args = inspect.getcallargs(func, *args, **kwargs)
-            call_args.pop(inspect.getargspec(func).args[0], None)
-            for k, v in call_args.items():
-                if validation.has_key(k) and (not isinstance(v, validation.get(k))):
-                    raise ValueError('{} except type: {}'.format(k, validation.get(k)))
-
-            return func(*args, **kwargs)
-
-        return wrapper
-
-    return outter_wrapper
+from dayu_file_format.deco import data_type_validation
 
 
 class Point2D(object):
@@ -33,6 +19,14 @@ class Point2D(object):
         self.x = float(x)
         self.y = float(y)
 
+    @classmethod
+    def _from_values(cls, x, y):
+        # trusted path for points read back from float columns, skips the argument validation
+        point = cls.__new__(cls)
+        point.x = float(x)
+        point.y = float(y)
+        return point
+
     def __eq__(self, other):
         if isinstance(other, Point2D):
             return round(self.x - other.x, 7) == 0 and round(self.y - other.y, 7) == 0
@@ -145,6 +139,14 @@ class KeyFrame(object):
         self.left = left
         self.right = right
 
+    @classmethod
+    def _from_values(cls, current_x, current_y, left_x, left_y, right_x, right_y):
+        keyframe = cls.__new__(cls)
+        keyframe.current = Point2D._from_values(current_x, current_y)
+        keyframe.left = Point2D._from_values(left_x, left_y)
+        keyframe.right = Point2D._from_values(right_x, right_y)
+        return keyframe
+
     @property
     def left_tangent(self):
         if round(self.left.x, 7) == 0:
@@ -167,3 +169,137 @@ class KeyFrame(object):
 
     def __repr__(self):
         return '<KeyPoint>(current={}, left={}, right={})'.format(self.current, self.left, self.right)
+
+
+class MappedColumn(object):
+    __slots__ = ['buffer', 'offset', 'stride', 'count', 'fmt']
+
+    def __init__(self, buffer, offset, stride, count, fmt='>f'):
+        self.buffer = buffer
+        self.offset = offset
+        self.stride = stride
+        self.count = count
+        self.fmt = fmt
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in xrange(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError('MappedColumn index out of range')
+        return struct.unpack_from(self.fmt, self.buffer, self.offset + index * self.stride)[0]
+
+    def __iter__(self):
+        for index in xrange(self.count):
+            yield self[index]
+
+    def to_numpy(self):
+        import numpy as np
+        return np.ndarray((self.count,), dtype=np.dtype(self.fmt), buffer=self.buffer,
+                          offset=self.offset, strides=(self.stride,))
+
+
+class KeyFrameColumns(object):
+    __slots__ = ['columns']
+
+    def __init__(self, columns=None):
+        if columns is None:
+            columns = tuple(array('d') for _ in range(6))
+        if len(columns) != 6 or len(set(len(c) for c in columns)) > 1:
+            raise ValueError('KeyFrameColumns needs six columns of the same length')
+        self.columns = tuple(columns)
+
+    @classmethod
+    def from_keyframes(cls, keyframes):
+        instance = cls()
+        instance.extend(keyframes)
+        return instance
+
+    @property
+    def times(self):
+        return self.columns[0]
+
+    @property
+    def mapped(self):
+        return any(isinstance(column, MappedColumn) for column in self.columns)
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in xrange(*index.indices(len(self)))]
+        return KeyFrame._from_values(*(column[index] for column in self.columns))
+
+    def __delitem__(self, index):
+        self._writable()
+        for column in self.columns:
+            del column[index]
+
+    def __iter__(self):
+        from_values = KeyFrame._from_values
+        for values in izip(*self.columns):
+            yield from_values(*values)
+
+    def __eq__(self, other):
+        if isinstance(other, (list, KeyFrameColumns)):
+            return len(self) == len(other) and all(a == b for a, b in izip(self, other))
+        return False
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def _writable(self):
+        if not all(isinstance(column, array) for column in self.columns):
+            self.columns = tuple(array('d', column) for column in self.columns)
+
+    @staticmethod
+    def _values(keyframe):
+        return (keyframe.current.x, keyframe.current.y,
+                keyframe.left.x, keyframe.left.y,
+                keyframe.right.x, keyframe.right.y)
+
+    def insert(self, index, keyframe):
+        self._writable()
+        for column, value in izip(self.columns, self._values(keyframe)):
+            column.insert(index, value)
+
+    def append(self, keyframe):
+        self._writable()
+        for column, value in izip(self.columns, self._values(keyframe)):
+            column.append(value)
+
+    def extend(self, keyframes):
+        self._writable()
+        for keyframe in keyframes:
+            for column, value in izip(self.columns, self._values(keyframe)):
+                column.append(value)
+
+    def pop(self, index=-1):
+        keyframe = self[index]
+        del self[index]
+        return keyframe
+
+    def index(self, keyframe):
+        for index, other in enumerate(self):
+            if other == keyframe:
+                return index
+        raise ValueError('{} is not in keyframes'.format(keyframe))
+
+    def take(self, order):
+        return KeyFrameColumns(tuple(array('d', (column[i] for i in order)) for column in self.columns))
+
+
+def column_to_numpy(column):
+    import numpy as np
+    if isinstance(column, array):
+        if not column:
+            return np.empty(0, dtype=np.float64)
+        return np.frombuffer(column, dtype=np.float64)
+    if isinstance(column, MappedColumn):
+        return column.to_numpy().astype(np.float64)
+    return np.asarray(column, dtype=np.float64)
@@ -4,10 +4,13 @@
 __author__ = 'andyguo'
 
 import bisect
+import math
 import struct
+from array import array
 
-from config import pack_fmt_code, pack_fmt_func, unpack_fmt_code
-from data_structure import Point2D, KeyFrame
+from config import pack_fmt_code, pack_fmt_func, unpack_fmt_code, native_byte_order, byte_order_marks, \
+    byte_order_prefix, time_index_block, quantized_dtypes, keyframe_columns
+from data_structure import column_to_numpy, Point2D, KeyFrame, KeyFrameColumns, MappedColumn
 
 
 class InterpolationMixin(object):
@@ -44,6 +47,356 @@ class InterpolationMixin(object):
 
         return None
 
+    def eval_many(self, xs, method=None):
+        import numpy as np
+        method = method if method else self.method
+        if not self._keyframes:
+            return None
+
+        func = getattr(self, '_eval_many_{}'.format(method))
+        if func:
+            return func(np.array(xs, dtype=np.float64, ndmin=1))
+
+        return None
+
+    def sample(self, start, end, step, method=None):
+        method = method if method else self.method
+        if step <= 0:
+            raise ValueError('step should be positive')
+
+        func = getattr(self, '_eval_{}'.format(method))
+        count = int(math.floor((end - start) / float(step) + 1e-9)) + 1
+        if not self._keyframes:
+            for i in xrange(count):
+                yield start + i * step, None
+            return
+
+        times = self._times
+        first_x = times[0]
+        last_x = times[-1]
+        table = None if method == 'step' else self._coefficient_table(method)
+        cursor = 0
+        for i in xrange(count):
+            x = start + i * step
+            if x <= first_x or x >= last_x:
+                yield x, func(x)
+                continue
+
+            while times[cursor] <= x:
+                cursor += 1
+            index = cursor - 1
+            if table is None:
+                yield x, self[index].current.y
+            else:
+                origin, c0, c1, c2, c3 = table
+                u = x - origin[index]
+                yield x, ((c3[index] * u + c2[index]) * u + c1[index]) * u + c0[index]
+
+    def _key_columns(self):
+        import numpy as np
+        times = column_to_numpy(self._times)
+        if self.compact:
+            columns = [column_to_numpy(c) for c in self._keyframes.columns]
+            return (times, columns[1],
+                    self._tangents_many(columns[2], columns[3]), self._tangents_many(columns[4], columns[5]))
+        count = len(self)
+        return (times,
+                np.fromiter((k.current.y for k in self), dtype=np.float64, count=count),
+                np.fromiter((k.left_tangent for k in self), dtype=np.float64, count=count),
+                np.fromiter((k.right_tangent for k in self), dtype=np.float64, count=count))
+
+    def _coefficient_table(self, method):
+        table = self._coefficients.get(method)
+        if table is None:
+            table = tuple(array('d', c.tostring()) for c in self._segment_table_many(method, *self._key_columns()))
+            self._coefficients[method] = table
+        return table
+
+    def _segment_coefficients(self, method, index):
+        import numpy as np
+        keyframes = (self[index], self[index + 1])
+        table = self._segment_table_many(method,
+                                         np.array([k.current.x for k in keyframes]),
+                                         np.array([k.current.y for k in keyframes]),
+                                         np.array([k.left_tangent for k in keyframes]),
+                                         np.array([k.right_tangent for k in keyframes]))
+        return tuple(float(c[0]) for c in table)
+
+    def _eval_polynomial(self, method, x):
+        index = bisect.bisect(self._times, x) - 1
+        if method not in self._coefficients and self.compact and self._keyframes.mapped:
+            # mapped keyframes are decoded per segment until something builds the whole table
+            origin, c0, c1, c2, c3 = self._segment_coefficients(method, index)
+            u = x - origin
+            return ((c3 * u + c2) * u + c1) * u + c0
+
+        origin, c0, c1, c2, c3 = self._coefficient_table(method)
+        u = x - origin[index]
+        return ((c3[index] * u + c2[index]) * u + c1[index]) * u + c0[index]
+
+    def _eval_many_extrapolate(self, xs, result):
+        left_most_keyframe = self[0]
+        right_most_keyframe = self[-1]
+        left_mask = xs <= left_most_keyframe.current.x
+        right_mask = (xs >= right_most_keyframe.current.x) & ~left_mask
+
+        result[left_mask] = left_most_keyframe.current.y - \
+                            self._get_safe_tangent(0, 'left') * (left_most_keyframe.current.x - xs[left_mask])
+        result[right_mask] = right_most_keyframe.current.y + \
+                             self._get_safe_tangent(-1, 'right') * (xs[right_mask] - right_most_keyframe.current.x)
+        return ~(left_mask | right_mask)
+
+    def _eval_many_polynomial(self, method, xs):
+        import numpy as np
+        result = np.empty_like(xs)
+        inner_mask = self._eval_many_extrapolate(xs, result)
+        if not inner_mask.any():
+            return result
+
+        x = xs[inner_mask]
+        index = np.searchsorted(column_to_numpy(self._times), x, side='right') - 1
+        origin, c0, c1, c2, c3 = (column_to_numpy(c)[index] for c in self._coefficient_table(method))
+        u = x - origin
+        result[inner_mask] = ((c3 * u + c2) * u + c1) * u + c0
+        return result
+
+    def _eval_many_step(self, xs):
+        import numpy as np
+        times, values = self._key_columns()[:2]
+        index = np.clip(np.searchsorted(times, xs, side='right') - 1, 0, len(times) - 1)
+        result = values[index]
+        result[xs >= times[-1]] = values[-1]
+        result[xs <= times[0]] = values[0]
+        return result
+
+    def _eval_many_linear(self, xs):
+        return self._eval_many_polynomial('linear', xs)
+
+    def _eval_many_hermite(self, xs):
+        return self._eval_many_polynomial('hermite', xs)
+
+    def _eval_many_cubic(self, xs):
+        return self._eval_many_polynomial('cubic', xs)
+
+    @staticmethod
+    def _tangents_many(vector_x, vector_y):
+        import numpy as np
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(np.round(vector_x, 7) == 0, 1e8, vector_y / vector_x)
+
+    def _segment_many_linear(self, times, values, left_tangents, right_tangents):
+        import numpy as np
+        delta_x = np.diff(times)
+        slope = np.diff(values) / delta_x
+        zero = np.zeros_like(delta_x)
+        return times[:-1], values[:-1], slope, zero, zero
+
+    def _segment_many_hermite(self, times, values, left_tangents, right_tangents):
+        import numpy as np
+        delta_x = np.diff(times)
+        delta_y = np.diff(values)
+        p0 = values[:-1]
+        p1 = right_tangents[:-1]
+        p2 = (3 * delta_y - (2 * p1 + left_tangents[1:]) * delta_x) / (delta_x ** 2)
+        p3 = ((left_tangents[1:] + p1) * delta_x - 2 * delta_y) / (delta_x ** 3)
+        return times[:-1], p0, p1, p2, p3
+
+    def _segment_many_step(self, times, values, left_tangents, right_tangents):
+        import numpy as np
+        zero = np.zeros(len(times) - 1)
+        return times[:-1], values[:-1], zero, zero, zero
+
+    def _segment_many_cubic(self, times, values, left_tangents, right_tangents):
+        import numpy as np
+        delta_x = np.diff(times)
+        f_z0 = values[:-1]
+        f_z0z1 = right_tangents[:-1]
+        f_z1z2 = np.diff(values) / delta_x
+        f_z2z3 = left_tangents[1:]
+        f_z0z1z2 = (f_z1z2 - f_z0z1) / delta_x
+        f_z1z2z3 = (f_z2z3 - f_z1z2) / delta_x
+        f_z0z1z2z3 = (f_z1z2z3 - f_z0z1z2) / delta_x
+        return times[:-1], f_z0, f_z0z1, f_z0z1z2 - f_z0z1z2z3 * delta_x, f_z0z1z2z3
+
+    def _segment_table_many(self, method, times, values, left_tangents, right_tangents):
+        import numpy as np
+        with np.errstate(divide='ignore', invalid='ignore'):
+            table = getattr(self, '_segment_many_{}'.format(method))(times, values, left_tangents, right_tangents)
+        flat = np.diff(times) <= 0
+        if flat.any():
+            table = tuple(np.where(flat, default, c)
+                          for c, default in zip(table, (times[:-1], values[:-1], 0.0, 0.0, 0.0)))
+        return table
+
+    def simplify(self, tolerance, method=None):
+        kept = self._simplified_columns(tolerance, method)
+        removed = len(self) - len(kept[0])
+        if removed:
+            self._replace_keyframes(KeyFrameColumns(tuple(array('d', c.tostring()) for c in kept)))
+        return removed
+
+    def _simplified_columns(self, tolerance, method=None):
+        import numpy as np
+        method = method if method else self.method
+        if tolerance < 0:
+            raise ValueError('tolerance should not be negative')
+
+        columns = [np.array(c, dtype=np.float64) for c in self.to_numpy()]
+        if len(self) < 3:
+            return columns
+
+        times, values, left_x, left_y, right_x, right_y = columns
+        left_tangents = self._tangents_many(left_x, left_y)
+        right_tangents = self._tangents_many(right_x, right_y)
+        original = self._segment_table_many(method, times, values, left_tangents, right_tangents)
+        lengths = np.diff(times)
+        refit = method in ('hermite', 'cubic')
+        if refit:
+            # the original curve at the keys and the midpoints of the original segments, to fit tangents to
+            sample_u = np.repeat(lengths, 2) * np.tile((0.0, 0.5), len(lengths))
+            origin, c0, c1, c2, c3 = (np.repeat(c, 2) for c in original)
+            sample_x = origin + sample_u
+            sample_y = ((c3 * sample_u + c2) * sample_u + c1) * sample_u + c0
+
+        kept = np.zeros(len(times), dtype=bool)
+        kept[0] = kept[-1] = True
+        # errors per original segment and fitted tangents per key, only redone where the reduced curve changed
+        error = np.zeros(len(lengths))
+        fitted = np.zeros(len(times), dtype=bool)
+        fit_right, fit_left = np.zeros(len(times)), np.zeros(len(times))
+        active = np.arange(len(lengths))
+        while True:
+            kept_index = np.flatnonzero(kept)
+            count = len(kept_index) - 1
+            # every original segment lies inside exactly one segment of the reduced curve
+            segment = (np.cumsum(kept)[:-1] - 1)[active]
+            active_original = tuple(c[active] for c in original)
+            kept_left, kept_right = left_tangents[kept_index], right_tangents[kept_index]
+            active_error = self._max_deviation(active_original, self._segment_table_many(
+                method, times[kept_index], values[kept_index], kept_left, kept_right), segment, lengths[active])
+            if refit:
+                samples = (active[:, None] * 2 + np.arange(2)).ravel()
+                right, left, usable = self._fit_tangents(times, values, kept_index, sample_x[samples],
+                                                         sample_y[samples], np.repeat(segment, 2), count)
+                fit_error = self._max_deviation(active_original, self._segment_table_many(
+                    method, times[kept_index], values[kept_index], np.append(kept_left[:1], left),
+                    np.append(right, kept_right[-1:])), segment, lengths[active])
+                use_fit = usable & (self._segment_max(fit_error, segment, count) <
+                                    self._segment_max(active_error, segment, count))
+                active_error = np.where(use_fit[segment], fit_error, active_error)
+                changed = np.unique(segment)
+                fitted[kept_index[changed]] = use_fit[changed]
+                fit_right[kept_index[changed]] = right[changed]
+                fit_left[kept_index[changed + 1]] = left[changed]
+            error[active] = active_error
+
+            segment_error = self._segment_max(active_error, segment, count)
+            failing = segment_error > tolerance
+            if not failing.any():
+                break
+
+            # the interior end of the worst original segment of every failing segment, plus the middle
+            # key when that one sits near an end, so each pass at least shrinks every failing segment to 3/4
+            worst = np.flatnonzero((active_error == segment_error[segment]) & failing[segment])
+            worst = worst[np.unique(segment[worst], return_index=True)[1]]
+            segment_start = kept_index[segment[worst]]
+            segment_end = kept_index[segment[worst] + 1]
+            worst = active[worst]
+            worst = np.where(worst == segment_start, worst + 1, worst)
+            if not (worst < segment_end).any():
+                break
+            middle = (segment_start + segment_end) // 2
+            unbalanced = np.abs(worst - middle) * 4 > segment_end - segment_start
+            kept[worst] = True
+            kept[middle[unbalanced]] = True
+            active = active[failing[segment]]
+
+        kept_index = np.flatnonzero(kept)
+        columns = [c[kept] for c in columns]
+        starts = np.flatnonzero(fitted[kept_index[:-1]])
+        columns[4][starts], columns[5][starts] = self._tangent_vectors(fit_right[kept_index[starts]], 1.0)
+        columns[2][starts + 1], columns[3][starts + 1] = self._tangent_vectors(fit_left[kept_index[starts + 1]],
+                                                                               -1.0)
+        if self[0].left == Point2D(0, 0):
+            left = Point2D(-1, -self._get_safe_tangent(0, 'left')).normalize()
+            columns[2][0], columns[3][0] = left.x, left.y
+        if self[-1].right == Point2D(0, 0):
+            right = Point2D(1, self._get_safe_tangent(-1, 'right')).normalize()
+            columns[4][-1], columns[5][-1] = right.x, right.y
+        return columns
+
+    @staticmethod
+    def _segment_max(error, segment, count):
+        import numpy as np
+        result = np.zeros(count)
+        starts = np.flatnonzero(np.concatenate(([True], np.diff(segment) != 0)))
+        result[segment[starts]] = np.maximum.reduceat(error, starts)
+        return result
+
+    @staticmethod
+    def _tangent_vectors(tangents, direction):
+        import numpy as np
+        length = np.sqrt(1.0 + tangents * tangents)
+        return direction / length, direction * tangents / length
+
+    @staticmethod
+    def _fit_tangents(times, values, kept_index, sample_x, sample_y, sample_segment, count):
+        import numpy as np
+        # least squares fit of the two end tangents of every reduced segment, in the hermite basis
+        # that both the hermite and the cubic segments reduce to
+        start = kept_index[sample_segment]
+        end = kept_index[sample_segment + 1]
+        length = times[end] - times[start]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (sample_x - times[start]) / length
+        t2, t3 = t * t, t * t * t
+        residual = sample_y - values[start] * (1 - 3 * t2 + 2 * t3) - values[end] * (3 * t2 - 2 * t3)
+        basis_right = length * (t - 2 * t2 + t3)
+        basis_left = length * (t3 - t2)
+
+        s00 = np.bincount(sample_segment, basis_right * basis_right, count)
+        s01 = np.bincount(sample_segment, basis_right * basis_left, count)
+        s11 = np.bincount(sample_segment, basis_left * basis_left, count)
+        r0 = np.bincount(sample_segment, basis_right * residual, count)
+        r1 = np.bincount(sample_segment, basis_left * residual, count)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            det = s00 * s11 - s01 * s01
+            right = (s11 * r0 - s01 * r1) / det
+            left = (s00 * r1 - s01 * r0) / det
+            usable = (det > 1e-12 * s00 * s11) & np.isfinite(right) & np.isfinite(left)
+        right = np.where(usable, right, 0.0)
+        left = np.where(usable, left, 0.0)
+        # round trip through the stored tangent vectors, so the error is bounded for what gets saved
+        right = InterpolationMixin._tangents_many(*InterpolationMixin._tangent_vectors(right, 1.0))
+        left = InterpolationMixin._tangents_many(*InterpolationMixin._tangent_vectors(left, -1.0))
+        return right, left, usable
+
+    @staticmethod
+    def _max_deviation(original, reduced, segment, lengths):
+        import numpy as np
+        # the difference of two cubics on every original segment is a cubic, so its largest absolute
+        # value sits at an end of the segment or at a root of its derivative
+        origin, c0, c1, c2, c3 = original
+        reduced_origin, d0, d1, d2, d3 = (c[segment] for c in reduced)
+        h = origin - reduced_origin
+        f0 = ((d3 * h + d2) * h + d1) * h + d0 - c0
+        f1 = (3 * d3 * h + 2 * d2) * h + d1 - c1
+        f2 = 3 * d3 * h + d2 - c2
+        f3 = d3 - c3
+
+        def deviation(u):
+            return np.abs(((f3 * u + f2) * u + f1) * u + f0)
+
+        a, b = 3 * f3, 2 * f2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            q = -0.5 * (b + np.copysign(np.sqrt(np.maximum(b * b - 4 * a * f1, 0)), b))
+            roots = (q / a, f1 / q)
+            error = np.maximum(deviation(0.0), deviation(lengths))
+            for root in roots:
+                root = np.where((root > 0) & (root < lengths), root, 0.0)
+                error = np.maximum(error, deviation(root))
+        return error
+
     def _eval_step(self, x):
         if x <= self[0].current.x:
             return self[0].current.y
@@ -51,7 +404,7 @@ class InterpolationMixin(object):
         if x >= self[-1].current.x:
             return self[-1].current.y
 
-        index = bisect.bisect([k.current.x for k in self], x)
+        index = bisect.bisect(self._times, x)
         prev_keyframe = self[index - 1]
         return prev_keyframe.current.y
 
@@ -68,13 +421,7 @@ class InterpolationMixin(object):
                      self._get_safe_tangent(-1, 'right') * (x - right_most_keyframe.current.x)
             return result
 
-        index = bisect.bisect([k.current.x for k in self], x)
-        prev_keyframe = self[index - 1]
-        next_keyframe = self[index]
-
-        t = (x - prev_keyframe.current.x) / float(next_keyframe.current.x - prev_keyframe.current.x)
-        result = (1.0 - t) * prev_keyframe.current.y + t * next_keyframe.current.y
-        return result
+        return self._eval_polynomial('linear', x)
 
     def _eval_hermite(self, x):
         if x <= self[0].current.x:
@@ -89,18 +436,7 @@ class InterpolationMixin(object):
                      self._get_safe_tangent(-1, 'right') * (x - right_most_keyframe.current.x)
             return result
 
-        index = bisect.bisect([k.current.x for k in self], x)
-        prev_keyframe = self[index - 1]
-        next_keyframe = self[index]
-
-        delta_x = next_keyframe.current.x - prev_keyframe.current.x
-        delta_y = next_keyframe.current.y - prev_keyframe.current.y
-        p0 = prev_keyframe.current.y
-        p1 = prev_keyframe.right_tangent
-        p2 = (3 * delta_y - (2 * p1 + next_keyframe.left_tangent) * delta_x) / (delta_x ** 2)
-        p3 = ((next_keyframe.left_tangent + p1) * delta_x - 2 * delta_y) / (delta_x ** 3)
-        result = ((p3 * x + p2) * x + p1) * x + p0
-        return result
+        return self._eval_polynomial('hermite', x)
 
     def _eval_cubic(self, x):
         if x <= self[0].current.x:
@@ -115,103 +451,336 @@ class InterpolationMixin(object):
                      self._get_safe_tangent(-1, 'right') * (x - right_most_keyframe.current.x)
             return result
 
-        index = bisect.bisect([k.current.x for k in self], x)
-        prev_keyframe = self[index - 1]
-        next_keyframe = self[index]
-
-        prev_x = prev_keyframe.current.x
-        prev_y = prev_keyframe.current.y
-        next_x = next_keyframe.current.x
-        next_y = next_keyframe.current.y
-
-        delta_x = next_x - prev_x
-        f_z0 = prev_y
-        f_z0z1 = prev_keyframe.right_tangent
-        f_z1z2 = (next_y - prev_y) / delta_x
-        f_z2z3 = next_keyframe.left_tangent
-        f_z0z1z2 = (f_z1z2 - f_z0z1) / delta_x
-        f_z1z2z3 = (f_z2z3 - f_z1z2) / delta_x
-        f_z0z1z2z3 = (f_z1z2z3 - f_z0z1z2) / delta_x
-
-        temp_p0 = x - prev_x
-        result = f_z0 + f_z0z1 * temp_p0 + f_z0z1z2 * (temp_p0 ** 2) + f_z0z1z2z3 * (x - next_x) * (temp_p0 ** 2)
-        return result
+        return self._eval_polynomial('cubic', x)
 
 
 class SaveLoadMixin(object):
     @classmethod
-    def load(cls, file_path):
-        instance = cls()
+    def load(cls, file_path, mmap=False, compact=False):
         if file_path.endswith(u'.curve'):
+            instance = cls(compact=compact)
             instance._load_ascii_file(file_path)
             return instance
 
         elif file_path.endswith(u'.bcurve'):
-            instance._load_binary_file(file_path)
+            instance = cls(compact=compact or mmap)
+            if mmap:
+                instance._map_binary_file(file_path)
+            else:
+                instance._load_binary_file(file_path)
             return instance
         else:
             raise IOError(u'cannot open {}'.format(file_path))
 
     @classmethod
-    def from_dict(cls, data):
-        curve = cls()
+    def load_many(cls, file_paths, workers=4, executor='thread', ordered=True, **kwargs):
+        from dayu_file_format.parallel import load_many
+        return load_many(cls, file_paths, workers=workers, executor=executor, ordered=ordered, **kwargs)
+
+    def _to_payload(self):
+        import numpy as np
+        return (self.method, self.extra_data, self.compact,
+                tuple(np.ascontiguousarray(c, dtype=np.float64).tostring() for c in self.to_numpy()))
+
+    @classmethod
+    def _from_payload(cls, payload):
+        method, extra_data, compact, data = payload
+        columns = tuple(array('d') for _ in data)
+        for column, column_data in zip(columns, data):
+            column.fromstring(column_data)
+        instance = cls(compact=compact)
+        instance.method = method
+        instance.extra_data = extra_data
+        instance._replace_keyframes(KeyFrameColumns(columns))
+        return instance
+
+    @classmethod
+    def probe(cls, file_path):
+        if file_path.endswith(u'.curve'):
+            from stream import CurveReader
+            return CurveReader(file_path).probe()
+
+        elif file_path.endswith(u'.bcurve'):
+            with open(file_path, 'rb') as bf:
+                return cls._probe_binary_file(bf)
+        else:
+            raise IOError(u'cannot open {}'.format(file_path))
+
+    @classmethod
+    def _probe_binary_file(cls, file_obj, offset=0, total_size=None):
+        import os
+        total_size = total_size if total_size is not None else os.fstat(file_obj.fileno()).st_size
+        file_obj.seek(offset)
+        magic, major_version, minor_version = struct.unpack('>4s 2h', file_obj.read(8))
+        if magic != 'curv':
+            raise ValueError('not a valid binary curve file!')
+
+        header = cls()
+        info = {'global': header.extra_data, 'method': header.method, 'format': None,
+                'count': 0, 'start': None, 'end': None}
+        byte_order = '>'
+        offset += 8
+        if major_version >= 2:
+            byte_order = byte_order_prefix[struct.unpack('>2s 6x', file_obj.read(8))[0]]
+            offset += 8
+
+        while offset < total_size:
+            file_obj.seek(offset)
+            atom_size, atom_type = struct.unpack('>I 4s', file_obj.read(8))
+            if atom_type == 'glob':
+                data = file_obj.read(atom_size - 8)
+                header._load_glob_part(data, 0, len(data))
+                info['method'] = header.method
+            func = getattr(cls, '_probe_{}_part'.format(atom_type), None)
+            if func:
+                info['format'] = atom_type
+                info['count'], info['start'], info['end'] = func(file_obj, offset + 8, offset + atom_size, byte_order)
+            offset += atom_size
+        return info
+
+    @staticmethod
+    def _probe_times(file_obj, offset, stride, count, fmt):
+        if not count:
+            return 0, None, None
+        file_obj.seek(offset)
+        start = struct.unpack(fmt, file_obj.read(struct.calcsize(fmt)))[0]
+        file_obj.seek(offset + (count - 1) * stride)
+        end = struct.unpack(fmt, file_obj.read(struct.calcsize(fmt)))[0]
+        return count, start, end
+
+    @classmethod
+    def _probe_keyf_part(cls, file_obj, start, end, byte_order):
+        return cls._probe_times(file_obj, start, 24, (end - start) // 24, byte_order + 'f')
+
+    @classmethod
+    def _probe_kf64_part(cls, file_obj, start, end, byte_order):
+        return cls._probe_times(file_obj, start, 8, (end - start) // 48, byte_order + 'd')
+
+    @classmethod
+    def _probe_keyq_part(cls, file_obj, start, end, byte_order):
+        file_obj.seek(start)
+        return cls._probe_times(file_obj, start + 4, 8, struct.unpack('>I', file_obj.read(4))[0], '<d')
+
+    @classmethod
+    def _probe_keyz_part(cls, file_obj, start, end, byte_order):
+        file_obj.seek(start)
+        count, size = struct.unpack('>2I', file_obj.read(8))
+        if not count:
+            return 0, None, None
+        times = cls._decode_keyz_column(file_obj.read(size), count)
+        return count, float(times[0]), float(times[-1])
+
+    @classmethod
+    def load_range(cls, file_path, start, end):
+        if not file_path.endswith(u'.bcurve'):
+            raise IOError(u'cannot load a range from {}'.format(file_path))
+        if start > end:
+            raise ValueError('start should not be greater than end')
+
+        import os
+        instance = cls(compact=True)
+        with open(file_path, 'rb') as bf:
+            magic, major_version, minor_version = struct.unpack('>4s 2h', bf.read(8))
+            if magic != 'curv':
+                raise ValueError('not a valid binary curve file!')
+
+            if major_version < 2:
+                bf.seek(0)
+                instance._load_binary_buffer(bf.read())
+                instance._trim_to_range(start, end)
+                return instance
+
+            byte_order = byte_order_prefix[struct.unpack('>2s 6x', bf.read(8))[0]]
+            atoms = {}
+            offset = 16
+            total_size = os.fstat(bf.fileno()).st_size
+            while offset < total_size:
+                bf.seek(offset)
+                atom_size, atom_type = struct.unpack('>I 4s', bf.read(8))
+                atoms[atom_type] = (offset + 8, offset + atom_size)
+                offset += atom_size
+
+            if 'kf64' not in atoms:
+                bf.seek(0)
+                instance._load_binary_buffer(bf.read())
+                instance._trim_to_range(start, end)
+                return instance
+
+            if 'glob' in atoms:
+                bf.seek(atoms['glob'][0])
+                data = bf.read(atoms['glob'][1] - atoms['glob'][0])
+                instance._load_glob_part(data, 0, len(data))
+
+            keyframe_start, keyframe_end = atoms['kf64']
+            count = (keyframe_end - keyframe_start) // 48
+            if not count:
+                return instance
+
+            block = count
+            index = array('d', [float('-inf')])
+            if 'tidx' in atoms:
+                bf.seek(atoms['tidx'][0])
+                block = struct.unpack(byte_order + 'I 4x', bf.read(8))[0]
+                index = cls._read_float64(bf, atoms['tidx'][0] + 8, 0, (atoms['tidx'][1] - atoms['tidx'][0] - 8) // 8,
+                                          byte_order)
+
+            def disk_bisect(func, value):
+                block_start = max(func(index, value) - 1, 0) * block
+                block_times = cls._read_float64(bf, keyframe_start, block_start, min(block_start + block, count),
+                                                byte_order)
+                return block_start + func(block_times, value)
+
+            low = max(disk_bisect(bisect.bisect_right, start) - 2, 0)
+            high = min(disk_bisect(bisect.bisect_left, end) + 2, count)
+            instance._replace_keyframes(KeyFrameColumns(tuple(
+                cls._read_float64(bf, keyframe_start + i * count * 8, low, high, byte_order) for i in range(6))))
+        return instance
+
+    def _trim_to_range(self, start, end):
+        times = self._times
+        low = max(bisect.bisect_right(times, start) - 2, 0)
+        high = min(bisect.bisect_left(times, end) + 2, len(times))
+        self._replace_keyframes(KeyFrameColumns(tuple(c[low:high] for c in self._keyframes.columns)))
+
+    @staticmethod
+    def _read_float64(file_obj, offset, low, high, byte_order):
+        values = array('d')
+        file_obj.seek(offset + low * 8)
+        values.fromstring(file_obj.read((high - low) * 8))
+        if byte_order != native_byte_order:
+            values.byteswap()
+        return values
+
+    @classmethod
+    def from_dict(cls, data, compact=False):
+        curve = cls(compact=compact)
         curve.extra_data = data['global']
-        for k in data['keyframes']:
-            curve._keyframes.append(KeyFrame(Point2D(*k[0]), Point2D(*k[1]), Point2D(*k[2])))
+        curve.method = str(data.get('method', curve.method))
+        if 'keyframes_v2' in data:
+            curve._replace_keyframes(cls._sorted_columns(KeyFrameColumns(
+                tuple(array('d', data['keyframes_v2'][name]) for name in keyframe_columns))))
+        else:
+            curve.extend(KeyFrame(Point2D(*k[0]), Point2D(*k[1]), Point2D(*k[2])) for k in data['keyframes'])
         return curve
 
     def _load_ascii_file(self, file_path):
-        import json
-        with open(file_path, 'r') as jf:
-            data = json.load(jf)
-            self.extra_data = data['global']
-            for k in data['keyframes']:
-                self._keyframes.append(KeyFrame(Point2D(*k[0]), Point2D(*k[1]), Point2D(*k[2])))
+        from stream import CurveReader
+        CurveReader(file_path, curve=self).read()
 
     def _load_binary_file(self, file_path):
-        import os
-        total_file_size = os.stat(file_path).st_size
-        with open(file_path, 'r') as bf:
-            magic, major_version, minor_version = struct.unpack_from('>4s 2h', bf.read(8))
-            if magic != 'curv':
-                raise ValueError('not a valid binary curve file!')
+        with open(file_path, 'rb') as bf:
+            self._load_binary_buffer(bf.read())
 
-            while bf.tell() < total_file_size:
-                atom = struct.unpack_from('>I 4s', bf.read(8))
-                func = getattr(self, '_load_{}_part'.format(atom[1]))
-                if func:
-                    func(bf, bf.tell() + atom[0] - 8)
-
-    def _load_keyf_part(self, file_obj, end):
-        while file_obj.tell() < end:
-            values = struct.unpack_from('>6f', file_obj.read(24))
-            self._keyframes.append(KeyFrame(Point2D(*values[:2]), Point2D(*values[2:4]), Point2D(*values[4:])))
-
-    def _load_glob_part(self, file_obj, end):
-        while file_obj.tell() < end:
-            key = ''.join(iter(lambda: file_obj.read(1), '\x00'))
-            data_type = struct.unpack_from('>2b', file_obj.read(2))[0]
+    def _map_binary_file(self, file_path):
+        import mmap
+        with open(file_path, 'rb') as bf:
+            self._load_binary_buffer(mmap.mmap(bf.fileno(), 0, access=mmap.ACCESS_READ), mapped=True)
+
+    def _load_binary_buffer(self, buf, mapped=False):
+        magic, major_version, minor_version = struct.unpack_from('>4s 2h', buf, 0)
+        if magic != 'curv':
+            raise ValueError('not a valid binary curve file!')
+
+        offset = 8
+        byte_order = '>'
+        if major_version >= 2:
+            byte_order = byte_order_prefix[struct.unpack_from('>2s', buf, offset)[0]]
+            offset = 16
+
+        total_size = len(buf)
+        while offset < total_size:
+            atom_size, atom_type = struct.unpack_from('>I 4s', buf, offset)
+            func = (mapped and getattr(self, '_map_{}_part'.format(atom_type), None)) or \
+                   getattr(self, '_load_{}_part'.format(atom_type))
+            if func:
+                func(buf, offset + 8, offset + atom_size, byte_order)
+            offset += atom_size
+
+    def _map_keyf_part(self, buf, start, end, byte_order='>'):
+        count = (end - start) // 24
+        self._replace_keyframes(KeyFrameColumns(tuple(MappedColumn(buf, start + 4 * i, 24, count, byte_order + 'f')
+                                                      for i in range(6))))
+
+    def _load_keyf_part(self, buf, start, end, byte_order='>'):
+        values = array('f')
+        values.fromstring(buffer(buf, start, end - start))
+        if byte_order != native_byte_order:
+            values.byteswap()
+        self._replace_keyframes(KeyFrameColumns(tuple(array('d', values[i::6]) for i in range(6))))
+
+    def _load_kf64_part(self, buf, start, end, byte_order=native_byte_order):
+        import numpy as np
+        count = (end - start) // 48
+        self._replace_keyframes(KeyFrameColumns(tuple(np.frombuffer(buf, dtype=np.dtype(byte_order + 'f8'),
+                                                                     count=count, offset=start + i * count * 8)
+                                                       for i in range(6))))
+
+    def _load_keyz_part(self, buf, start, end, byte_order=native_byte_order):
+        count = struct.unpack_from('>I', buf, start)[0]
+        offset = start + 4
+        columns = []
+        for _ in range(6):
+            size = struct.unpack_from('>I', buf, offset)[0]
+            columns.append(self._decode_keyz_column(buffer(buf, offset + 4, size), count))
+            offset += 4 + size
+        self._replace_keyframes(KeyFrameColumns(tuple(columns)))
+
+    @staticmethod
+    def _decode_keyz_column(data, count):
+        import zlib
+        import numpy as np
+        planes = np.frombuffer(zlib.decompress(data), dtype=np.uint8)
+        deltas = planes.reshape(8, count).T.copy().view('<u8').ravel()
+        return np.cumsum(deltas, dtype=np.uint64).view('<f8').astype(np.float64)
+
+    def _load_keyq_part(self, buf, start, end, byte_order=native_byte_order):
+        import numpy as np
+        count = struct.unpack_from('>I', buf, start)[0]
+        columns = [np.frombuffer(buf, dtype='<f8', count=count, offset=start + 4).astype(np.float64)]
+        offset = start + 4 + count * 8
+        for _ in range(5):
+            bits, value_offset, scale = struct.unpack_from('>B 3x d d', buf, offset)
+            offset += 20
+            dtype = np.dtype(quantized_dtypes[bits])
+            data = np.frombuffer(buf, dtype=dtype, count=count, offset=offset)
+            columns.append(self._dequantize_column(bits, value_offset, scale, data))
+            offset += count * dtype.itemsize
+        if count and offset + 32 <= end:
+            columns = self._restore_end_vectors(columns, struct.unpack_from('<4d', buf, offset))
+        self._replace_keyframes(KeyFrameColumns(tuple(columns)))
+
+    def _load_tidx_part(self, buf, start, end, byte_order=native_byte_order):
+        pass
+
+    def _load_glob_part(self, buf, start, end, byte_order='>'):
+        offset = start
+        while offset < end:
+            key_end = buf.find('\x00', offset)
+            key = buf[offset:key_end]
+            data_type = struct.unpack_from('>b', buf, key_end + 1)[0]
             func = getattr(self, '_load_glob_value_{}'.format(unpack_fmt_code[data_type].__name__))
             if func:
-                value = func(file_obj)
+                value, offset = func(buf, key_end + 3)
                 if key == 'method':
                     self.method = value
                 else:
                     self.extra_data[key] = value
 
-    def _load_glob_value_str(self, file_obj):
-        return ''.join(iter(lambda: file_obj.read(1), '\x00'))
+    def _load_glob_value_str(self, buf, offset):
+        value_end = buf.find('\x00', offset)
+        return buf[offset:value_end], value_end + 1
 
-    def _load_glob_value_int(self, file_obj):
-        return struct.unpack_from('>i b', file_obj.read(5))[0]
+    def _load_glob_value_int(self, buf, offset):
+        return struct.unpack_from('>i', buf, offset)[0], offset + 5
 
-    def _load_glob_value_long(self, file_obj):
-        return struct.unpack_from('>l b', file_obj.read(5))[0]
+    def _load_glob_value_long(self, buf, offset):
+        return struct.unpack_from('>l', buf, offset)[0], offset + 5
 
-    def _load_glob_value_float(self, file_obj):
-        return struct.unpack_from('>f b', file_obj.read(5))[0]
+    def _load_glob_value_float(self, buf, offset):
+        return struct.unpack_from('>f', buf, offset)[0], offset + 5
 
-    def save(self, file_path, **kwargs):
+    def save(self, file_path, simplify_tolerance=None, bcurve_version=None, bcurve_compress=False,
+             bcurve_max_error=None, json_columnar=False, **kwargs):
         if not all([isinstance(x, str) for x in kwargs]):
             raise ValueError('global keys should all be str')
 
@@ -221,23 +790,35 @@ class SaveLoadMixin(object):
         if not file_path.endswith(('.curve', '.bcurve')):
             raise ValueError(u'file name should end with .curve or .bcurve')
 
+        if simplify_tolerance is not None:
+            curve = self.from_numpy(self._simplified_columns(simplify_tolerance))
+            curve.method = self.method
+            curve.extra_data = self.extra_data
+            return curve.save(file_path, bcurve_version=bcurve_version, bcurve_compress=bcurve_compress,
+                              bcurve_max_error=bcurve_max_error, json_columnar=json_columnar, **kwargs)
+
         if file_path.endswith('.curve'):
-            return self._save_ascii_file(file_path, **kwargs)
+            return self._save_ascii_file(file_path, json_columnar=json_columnar, **kwargs)
 
         if file_path.endswith('.bcurve'):
-            return self._save_binary_file(file_path, **kwargs)
+            return self._save_binary_file(file_path, bcurve_version=bcurve_version, bcurve_compress=bcurve_compress,
+                                          bcurve_max_error=bcurve_max_error, **kwargs)
 
-    def to_dict(self, **kwargs):
+    def to_dict(self, json_columnar=False, **kwargs):
         temp_dict = self.extra_data
         temp_dict.update(kwargs)
+        if json_columnar:
+            columns = dict(zip(keyframe_columns, (c.tolist() for c in self.to_numpy())))
+            return {'global': temp_dict, 'method': self.method, 'keyframes_v2': columns}
+
         result = {'global': temp_dict, 'method': self.method, 'keyframes': []}
         for k in self:
             result['keyframes'].append(k.to_list())
         return result
 
-    def _save_ascii_file(self, file_path, **kwargs):
+    def _save_ascii_file(self, file_path, json_columnar=False, **kwargs):
         import json
-        result = self.to_dict(**kwargs)
+        result = self.to_dict(json_columnar=json_columnar, **kwargs)
 
         try:
             with open(file_path, 'w') as jf:
@@ -247,31 +828,188 @@ class SaveLoadMixin(object):
             print e
             return False
 
-    def _save_binary_file(self, file_path, **kwargs):
+    def _save_binary_file(self, file_path, bcurve_version=None, bcurve_compress=False, bcurve_max_error=None,
+                          **kwargs):
+        version = bcurve_version or (2 if bcurve_compress or bcurve_max_error is not None else 1)
+        if version not in (1, 2):
+            raise ValueError('unsupported bcurve version: {}'.format(version))
+        if (bcurve_compress or bcurve_max_error is not None) and version != 2:
+            raise ValueError('compressed or quantized keyframes need bcurve version 2')
+
+        if version == 1:
+            with open(file_path, 'wb') as bf:
+                self._write_binary(bf, bcurve_version=version, **kwargs)
+            return
+
+        from cStringIO import StringIO
+        data = StringIO()
+        self._write_binary(data, bcurve_version=version, bcurve_compress=bcurve_compress,
+                           bcurve_max_error=bcurve_max_error, **kwargs)
+        with open(file_path, 'wb') as bf:
+            bf.write(data.getvalue())
+
+    def _write_binary(self, file_obj, bcurve_version=1, bcurve_compress=False, bcurve_max_error=None, **kwargs):
         magic = 'curv'
         major_version = 0x0000
         minor_version = 0x0001
 
-        with open(file_path, 'wb') as bf:
-            bf.write(struct.pack('>4s', magic))
-            bf.write(struct.pack('>2h', major_version, minor_version))
-            self._write_global_part(bf, **kwargs)
-            self._write_keyframe_part(bf)
+        if bcurve_version == 2:
+            if bcurve_compress and bcurve_max_error is not None:
+                raise ValueError('bcurve_compress and bcurve_max_error cannot be used together')
+            file_obj.write(struct.pack('>4s 2h 2s 6x', magic, 0x0002, 0x0000, byte_order_marks[native_byte_order]))
+            if bcurve_max_error is not None:
+                self._write_keyq_part(file_obj, bcurve_max_error)
+            elif bcurve_compress:
+                self._write_keyz_part(file_obj)
+            else:
+                self._write_kf64_part(file_obj)
+            self._write_tidx_part(file_obj)
+            self._write_global_part(file_obj, **kwargs)
+            return
 
-    def _write_keyframe_part(self, file_obj):
-        keyframe_atom = {'size': 0, 'type': 'keyf'}
+        file_obj.write(struct.pack('>4s', magic))
+        file_obj.write(struct.pack('>2h', major_version, minor_version))
+        self._write_global_part(file_obj, **kwargs)
+        self._write_keyframe_part(file_obj)
 
-        if not self._keyframes:
-            keyframe_atom['size'] = 8
-            file_obj.write(struct.pack('>I 4s', keyframe_atom['size'], keyframe_atom['type']))
+    def _write_keyframe_part(self, file_obj, chunk_size=65536):
+        count = len(self)
+        atom_header = struct.pack('>I 4s', 8 + count * 24, 'keyf')
+        if not count:
+            file_obj.write(atom_header)
             return
 
-        fmt_string = '>{}f'.format(len(self) * 6)
-        keyframe_atom['size'] = 8 + struct.calcsize(fmt_string)
-        file_obj.write(struct.pack('>I 4s', keyframe_atom['size'], keyframe_atom['type']))
+        columns = self._column_views() if self.compact else None
 
-        for k in self:
-            file_obj.write(struct.pack('>6f', k.current.x, k.current.y, k.left.x, k.left.y, k.right.x, k.right.y))
+        for start in xrange(0, count, chunk_size):
+            end = min(start + chunk_size, count)
+            if columns is None:
+                keyframes = self._keyframes[start:end]
+                chunk = struct.pack('>{}f'.format(len(keyframes) * 6),
+                                    *[v for k in keyframes
+                                      for v in (k.current.x, k.current.y, k.left.x, k.left.y, k.right.x, k.right.y)])
+            else:
+                import numpy as np
+                rows = np.empty((end - start, 6), dtype='>f4')
+                for index, column in enumerate(columns):
+                    rows[:, index] = column[start:end]
+                chunk = rows.tostring()
+            file_obj.write(atom_header + chunk)
+            atom_header = ''
+
+    def _column_views(self):
+        return [c.to_numpy() if isinstance(c, MappedColumn) else column_to_numpy(c) for c in self._keyframes.columns]
+
+    def _write_kf64_part(self, file_obj, chunk_size=65536):
+        from operator import attrgetter
+        count = len(self)
+        file_obj.write(struct.pack('>I 4s', 8 + count * 48, 'kf64'))
+        if self.compact:
+            import numpy as np
+            for column in self._column_views():
+                for start in xrange(0, count, chunk_size):
+                    file_obj.write(np.ascontiguousarray(column[start:start + chunk_size], dtype=np.float64).tostring())
+            return
+
+        for name in ('current.x', 'current.y', 'left.x', 'left.y', 'right.x', 'right.y'):
+            getter = attrgetter(name)
+            for start in xrange(0, count, chunk_size):
+                file_obj.write(array('d', (getter(k) for k in self._keyframes[start:start + chunk_size])).tostring())
+
+    def _write_keyz_part(self, file_obj, level=6):
+        import zlib
+        import numpy as np
+        count = len(self)
+        columns = self._column_views() if self.compact else self.to_numpy()
+        parts = [struct.pack('>I', count)]
+        for column in columns:
+            bits = np.asarray(column, dtype='<f8').view('<u8')
+            deltas = bits.copy()
+            deltas[1:] -= bits[:-1]
+            data = zlib.compress(deltas.view(np.uint8).reshape(count, 8).T.tostring(), level)
+            parts.append(struct.pack('>I', len(data)) + data)
+        data = ''.join(parts)
+        file_obj.write(struct.pack('>I 4s', 8 + len(data), 'keyz'))
+        file_obj.write(data)
+
+    def _write_keyq_part(self, file_obj, max_error):
+        import numpy as np
+        if not max_error > 0:
+            raise ValueError('max_error should be greater than 0')
+
+        columns = self.to_numpy()
+        encoded = [self._quantize_column(c, max_error) for c in columns[1:]]
+        if self._quantized_error(columns, encoded) > max_error:
+            encoded[1:] = [(64, 0.0, 1.0, np.asarray(c, dtype=np.float64)) for c in columns[2:]]
+            if self._quantized_error(columns, encoded) > max_error:
+                raise ValueError('cannot keep the quantized curve within max_error {}'.format(max_error))
+
+        parts = [struct.pack('>I', len(self)), np.asarray(columns[0], dtype='<f8').tostring()]
+        for bits, offset, scale, data in encoded:
+            parts.append(struct.pack('>B 3x d d', bits, offset, scale))
+            parts.append(data.astype(quantized_dtypes[bits]).tostring())
+        if len(self):
+            parts.append(struct.pack('<4d', *self._end_vectors(columns)))
+        data = ''.join(parts)
+        file_obj.write(struct.pack('>I 4s', 8 + len(data), 'keyq'))
+        file_obj.write(data)
+
+    @staticmethod
+    def _quantize_column(column, max_error):
+        import numpy as np
+        column = np.asarray(column, dtype=np.float64)
+        low = float(column.min()) if len(column) else 0.0
+        high = float(column.max()) if len(column) else 0.0
+        for bits in (8, 16):
+            scale = (high - low) / (2 ** bits - 1)
+            data = np.rint((column - low) / scale) if scale else np.zeros(len(column))
+            if not len(column) or np.abs(low + data * scale - column).max() <= max_error:
+                return bits, low, scale, data
+        return 64, 0.0, 1.0, column
+
+    @staticmethod
+    def _dequantize_column(bits, offset, scale, data):
+        import numpy as np
+        if bits == 64:
+            return np.asarray(data, dtype=np.float64)
+        return offset + np.asarray(data, dtype=np.float64) * scale
+
+    @staticmethod
+    def _end_vectors(columns):
+        return columns[2][0], columns[3][0], columns[4][-1], columns[5][-1]
+
+    @staticmethod
+    def _restore_end_vectors(columns, vectors):
+        import numpy as np
+        columns = list(columns)
+        for index, position, value in zip((2, 3, 4, 5), (0, 0, -1, -1), vectors):
+            columns[index] = np.array(columns[index], dtype=np.float64)
+            columns[index][position] = value
+        return columns
+
+    def _quantized_error(self, columns, encoded):
+        import numpy as np
+        if len(columns[0]) == 0:
+            return 0.0
+        times = np.asarray(columns[0], dtype=np.float64)
+        decoded = self._restore_end_vectors([times] + [self._dequantize_column(*e) for e in encoded],
+                                            self._end_vectors(columns))
+        reconstructed = self.from_numpy(decoded)
+        with np.errstate(invalid='ignore'):
+            error = np.abs(decoded[1] - np.asarray(columns[1], dtype=np.float64))
+            if len(times) > 1:
+                original = self._segment_table_many(self.method, *self._key_columns())
+                reduced = reconstructed._segment_table_many(self.method, *reconstructed._key_columns())
+                segment = np.arange(len(times) - 1)
+                error = np.concatenate((error, self._max_deviation(original, reduced, segment, np.diff(times))))
+        return np.where(np.isnan(error), np.inf, error).max()
+
+    def _write_tidx_part(self, file_obj):
+        times = self._times
+        index = array('d', (times[i] for i in xrange(0, len(times), time_index_block)))
+        file_obj.write(struct.pack('>I 4s', 16 + len(index) * 8, 'tidx'))
+        file_obj.write(struct.pack(native_byte_order + 'I 4x', time_index_block))
+        file_obj.write(index.tostring())
 
     def _write_global_value_str(self, key, value, file_obj):
         file_obj.write(struct.pack('>{}s b b b{}s b'.format(len(key), len(value)),
@@ -296,7 +1034,9 @@ class SaveLoadMixin(object):
         temp_dict = self.extra_data
         temp_dict.update(kwargs)
         temp_dict.update(method=self.method)
-        ordered_values = temp_dict.items()
+        ordered_values = [(key.encode('utf-8') if isinstance(key, unicode) else key,
+                           value.encode('utf-8') if isinstance(value, unicode) else value)
+                          for key, value in temp_dict.iteritems()]
         for key, value in ordered_values:
             fmt_string += '{key}s b b b {value} b '.format(key=len(key),
                                                            value=pack_fmt_func[type(value)](value))
@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+__author__ = 'andyguo'
+
+import json
+import os
+import re
+import struct
+from array import array
+from collections import Iterable
+
+from base import Curve
+from config import keyframe_columns
+from data_structure import data_type_validation, KeyFrame, KeyFrameColumns
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+KEYFRAMES_END = re.compile(r'["}]')
+
+
+class CurveWriter(object):
+    def __init__(self, file_path, method='cubic', buffer_size=4096, **kwargs):
+        self.file_path = file_path
+        self.buffer_size = buffer_size
+        self._count = 0
+        self._last_time = None
+        self._buffer = []
+
+        header = Curve()
+        header.method = method
+        self._file = open(file_path, 'wb')
+        self._file.write(struct.pack('>4s 2h', 'curv', 0x0000, 0x0001))
+        header._write_global_part(self._file, **kwargs)
+        self._size_offset = self._file.tell()
+        self._file.write(struct.pack('>I 4s', 8, 'keyf'))
+        self._file.flush()
+
+    def __len__(self):
+        return self._count + len(self._buffer) // 6
+
+    @data_type_validation(keyframe=KeyFrame)
+    def append(self, keyframe):
+        if self._last_time is not None and keyframe.current.x < self._last_time:
+            raise ValueError('keyframes should be appended in time order')
+        self._last_time = keyframe.current.x
+        self._buffer.extend((keyframe.current.x, keyframe.current.y, keyframe.left.x, keyframe.left.y,
+                             keyframe.right.x, keyframe.right.y))
+        if len(self._buffer) >= self.buffer_size * 6:
+            self.flush()
+
+    @data_type_validation(keyframes=Iterable)
+    def append_many(self, keyframes):
+        for keyframe in keyframes:
+            self.append(keyframe)
+
+    def flush(self):
+        if self._buffer:
+            self._file.seek(0, 2)
+            self._file.write(struct.pack('>{}f'.format(len(self._buffer)), *self._buffer))
+            self._count += len(self._buffer) // 6
+            self._buffer = []
+            self._file.seek(self._size_offset)
+            self._file.write(struct.pack('>I', 8 + self._count * 24))
+        self._file.flush()
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class CurveReader(object):
+    def __init__(self, file_path, curve=None, chunk_size=65536):
+        self.file_path = file_path
+        self.curve = curve if curve is not None else Curve(compact=True)
+        self.chunk_size = chunk_size
+        self.total_size = os.stat(file_path).st_size
+        self.read_size = 0
+        self._decoder = json.JSONDecoder()
+        self._columns = tuple(array('d') for _ in range(6))
+        self._file = None
+        self._buffer = ''
+        self._pos = 0
+
+    def __iter__(self):
+        with open(self.file_path, 'r') as self._file:
+            self._expect('{')
+            while not self._next_is('}'):
+                key = self._decode()
+                self._expect(':')
+                if key == 'keyframes':
+                    for progress in self._read_keyframes():
+                        yield progress
+                elif key == 'keyframes_v2':
+                    for progress in self._read_columns():
+                        yield progress
+                elif key == 'global':
+                    self.curve.extra_data = self._decode()
+                elif key == 'method':
+                    self.curve.method = str(self._decode())
+                else:
+                    self._decode()
+                self._next_is(',')
+
+        self.curve._replace_keyframes(self.curve._sorted_columns(KeyFrameColumns(self._columns)))
+        self._columns = tuple(array('d') for _ in range(6))
+        yield len(self.curve), self.read_size, self.total_size
+
+    def read(self):
+        for _ in self:
+            pass
+        return self.curve
+
+    def probe(self, channels_key=None):
+        with open(self.file_path, 'r') as self._file:
+            return self._probe_object(channels_key, stop_early=True)
+
+    def _probe_object(self, channels_key=None, stop_early=False):
+        if channels_key:
+            info = {'global': {}, channels_key: {}}
+            wanted = {'global', channels_key}
+        else:
+            info = {'global': {}, 'method': None, 'format': None, 'count': 0, 'start': None, 'end': None}
+            wanted = {'global', 'method', 'keyframes'}
+
+        self._expect('{')
+        while not self._next_is('}'):
+            key = self._decode()
+            self._expect(':')
+            if key == channels_key:
+                self._expect('{')
+                while not self._next_is('}'):
+                    name = self._decode()
+                    self._expect(':')
+                    info[channels_key][name] = self._probe_object()
+                    self._next_is(',')
+            elif key in ('keyframes', 'keyframes_v2'):
+                info['format'] = key
+                info['count'], info['start'], info['end'] = getattr(self, '_probe_{}'.format(key))()
+                key = 'keyframes'
+            elif key in info:
+                info[key] = self._decode()
+            else:
+                self._decode()
+
+            wanted.discard(key)
+            if stop_early and not wanted:
+                return info
+            self._next_is(',')
+        return info
+
+    def _probe_keyframes(self):
+        self._expect('[')
+        if self._next_is(']'):
+            return 0, None, None
+
+        first = last = self._decode()
+        opens = 4
+        counted = self._pos
+        while True:
+            match = KEYFRAMES_END.search(self._buffer, counted)
+            stop = match.start() if match else len(self._buffer)
+            opens += self._buffer.count('[', counted, stop)
+            if match:
+                break
+            self._pos = max(self._pos, stop - 4096)
+            counted = stop - self._pos
+            if not self._fill():
+                raise ValueError('not a valid curve file: keyframes are not closed')
+
+        end = self._buffer.rindex(']', self._pos, stop)
+        if opens > 4:
+            start = end
+            for _ in range(4):
+                start = self._buffer.rindex('[', self._pos, start)
+            last = self._decoder.raw_decode(self._buffer, start)[0]
+        self._pos = end + 1
+        return opens // 4, first[0][0], last[0][0]
+
+    def _probe_keyframes_v2(self):
+        count, start, end = 0, None, None
+        self._expect('{')
+        while not self._next_is('}'):
+            name = self._decode()
+            self._expect(':')
+            if name == 'x':
+                times = self._decode()
+                count, start, end = len(times), times[0] if times else None, times[-1] if times else None
+            else:
+                self._skip_array()
+            self._next_is(',')
+        return count, start, end
+
+    def _skip_array(self):
+        self._expect('[')
+        while True:
+            end = self._buffer.find(']', self._pos)
+            if end >= 0:
+                self._pos = end + 1
+                return
+            self._pos = len(self._buffer)
+            if not self._fill():
+                raise ValueError('not a valid curve file: array is not closed')
+
+    def _read_keyframes(self):
+        current_x, current_y, left_x, left_y, right_x, right_y = self._columns
+        self._expect('[')
+        while not self._next_is(']'):
+            read_size = self.read_size
+            (x, y), (lx, ly), (rx, ry) = self._decode()
+            current_x.append(x)
+            current_y.append(y)
+            left_x.append(lx)
+            left_y.append(ly)
+            right_x.append(rx)
+            right_y.append(ry)
+            self._next_is(',')
+            if self.read_size != read_size:
+                yield len(current_x), self.read_size, self.total_size
+
+    def _read_columns(self):
+        columns = dict(zip(keyframe_columns, self._columns))
+        self._expect('{')
+        while not self._next_is('}'):
+            name = self._decode()
+            self._expect(':')
+            if name not in columns:
+                raise ValueError('not a valid curve file: unknown keyframe column {}'.format(name))
+            columns[name].extend(self._decode())
+            self._next_is(',')
+            yield len(self._columns[0]), self.read_size, self.total_size
+
+    def _fill(self, size=None):
+        chunk = self._file.read(size or self.chunk_size)
+        if not chunk:
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        self.read_size += len(chunk)
+        return True
+
+    def _skip_whitespace(self):
+        while True:
+            self._pos = WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer) or not self._fill():
+                return
+
+    def _next_is(self, char):
+        self._skip_whitespace()
+        if self._buffer[self._pos:self._pos + 1] == char:
+            self._pos += 1
+            return True
+        return False
+
+    def _expect(self, char):
+        if not self._next_is(char):
+            raise ValueError('not a valid curve file: expected {!r} at byte {}'.format(
+                char, self.read_size - len(self._buffer) + self._pos))
+
+    def _decode(self):
+        self._skip_whitespace()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except ValueError:
+                if not self._fill(size):
+                    raise
+                size *= 2
+                continue
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
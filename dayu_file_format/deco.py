@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+__author__ = 'andyguo'
+
+import inspect
+import os
+from functools import wraps
+
+VALIDATION_ENV = 'DAYU_FILE_FORMAT_VALIDATION'
+VALIDATION_ENABLED = os.environ.get(VALIDATION_ENV, '1').lower() not in ('0', 'false', 'off', 'no')
+
+
+def set_validation(enabled):
+    global VALIDATION_ENABLED
+    VALIDATION_ENABLED = bool(enabled)
+
+
+def data_type_validation(**validation):
+    def outter_wrapper(func):
+        # with the environment switch off, functions are left undecorated and cost nothing extra
+        if not VALIDATION_ENABLED:
+            return func
+
+        arg_spec = inspect.getargspec(func)
+        defaults = dict(zip(arg_spec.args[-len(arg_spec.defaults):], arg_spec.defaults)) if arg_spec.defaults else {}
+        checks = tuple((index, name, validation[name], set())
+                       for index, name in enumerate(arg_spec.args)
+                       if index > 0 and name in validation)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if VALIDATION_ENABLED:
+                arg_count = len(args)
+                for index, name, data_type, accepted_types in checks:
+                    if index < arg_count:
+                        value = args[index]
+                    elif name in kwargs:
+                        value = kwargs[name]
+                    elif name in defaults:
+                        value = defaults[name]
+                    else:
+                        continue
+                    if type(value) in accepted_types:
+                        continue
+                    if not isinstance(value, data_type):
+                        raise ValueError('{} except type: {}'.format(name, data_type))
+                    accepted_types.add(type(value))
+
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    return outter_wrapper
@@ -330,6 +330,31 @@ class Matrix_33f(MatrixBase):
         mapping = {'x': mx, 'y': my, 'z': mz}
         return mapping[order[2]] * mapping[order[1]] * mapping[order[0]]
 
+    @classmethod
+    def from_euler_angles_many(cls, rx, ry, rz, order='xyz'):
+        import numpy as np
+        rx, ry, rz = (np.radians(a) for a in np.broadcast_arrays(*(np.asarray(a, dtype=np.float64)
+                                                                    for a in (rx, ry, rz))))
+        count = rx.shape[0] if rx.ndim else 1
+        mx = np.zeros((count, 3, 3))
+        mx[:, 0, 0] = 1.0
+        mx[:, 1, 1] = mx[:, 2, 2] = np.cos(rx)
+        mx[:, 1, 2] = -np.sin(rx)
+        mx[:, 2, 1] = -mx[:, 1, 2]
+        my = np.zeros((count, 3, 3))
+        my[:, 1, 1] = 1.0
+        my[:, 0, 0] = my[:, 2, 2] = np.cos(ry)
+        my[:, 0, 2] = np.sin(ry)
+        my[:, 2, 0] = -my[:, 0, 2]
+        mz = np.zeros((count, 3, 3))
+        mz[:, 2, 2] = 1.0
+        mz[:, 0, 0] = mz[:, 1, 1] = np.cos(rz)
+        mz[:, 0, 1] = -np.sin(rz)
+        mz[:, 1, 0] = -mz[:, 0, 1]
+
+        mapping = {'x': mx, 'y': my, 'z': mz}
+        return np.matmul(np.matmul(mapping[order[2]], mapping[order[1]]), mapping[order[0]])
+
     def quaternion(self):
         from quaternion import Quaternion
         return Quaternion.from_matrix(self)
@@ -367,6 +392,30 @@ class Matrix_33f(MatrixBase):
             angle_3 = -math.degrees(math.atan2(self[1][2], self[2][2]))
             return angle_3, angle_2, angle_1
 
+    @classmethod
+    def euler_angles_many(cls, m33, order='xyz'):
+        import numpy as np
+        m33 = np.asarray(m33, dtype=np.float64)
+
+        def atan2(a, b):
+            return np.degrees(np.arctan2(m33[:, a[0], a[1]], m33[:, b[0], b[1]]))
+
+        def asin(a):
+            return np.degrees(np.arcsin(np.clip(m33[:, a[0], a[1]], -1.0, 1.0)))
+
+        if order == 'xyz':
+            return atan2((2, 1), (2, 2)), -asin((2, 0)), atan2((1, 0), (0, 0))
+        if order == 'xzy':
+            return -atan2((1, 2), (1, 1)), -atan2((2, 0), (0, 0)), asin((1, 0))
+        if order == 'yzx':
+            return atan2((2, 1), (1, 1)), atan2((0, 2), (0, 0)), -asin((0, 1))
+        if order == 'yxz':
+            return asin((2, 0)), -atan2((0, 1), (1, 1)), -atan2((2, 0), (2, 2))
+        if order == 'zxy':
+            return -asin((1, 2)), atan2((0, 2), (2, 2)), atan2((1, 0), (1, 1))
+        if order == 'zyx':
+            return -atan2((1, 2), (2, 2)), asin((0, 2)), -atan2((0, 1), (0, 0))
+
 
 class Matrix_44f(MatrixBase):
     dimension = (4, 4)
@@ -640,6 +689,28 @@ class Matrix_44f(MatrixBase):
         mapping = {'s': scale_matrix, 'r': rotate_matrix, 't': translate_matrix}
         return mapping[transform_order[2]] * mapping[transform_order[1]] * mapping[transform_order[0]]
 
+    @classmethod
+    def compose_many(cls, x, y, z, rx, ry, rz, sx=1.0, sy=1.0, sz=1.0, transform_order='srt', rotation_order='xyz'):
+        import numpy as np
+        x, y, z, rx, ry, rz, sx, sy, sz = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64)
+                                                                for a in (x, y, z, rx, ry, rz, sx, sy, sz)))
+        count = x.shape[0] if x.ndim else 1
+        translate_matrix = np.tile(np.eye(4), (count, 1, 1))
+        translate_matrix[:, 0, 3] = x
+        translate_matrix[:, 1, 3] = y
+        translate_matrix[:, 2, 3] = z
+        rotate_matrix = np.tile(np.eye(4), (count, 1, 1))
+        rotate_matrix[:, :3, :3] = Matrix_33f.from_euler_angles_many(rx, ry, rz, order=rotation_order)
+        scale_matrix = np.zeros((count, 4, 4))
+        scale_matrix[:, 0, 0] = sx
+        scale_matrix[:, 1, 1] = sy
+        scale_matrix[:, 2, 2] = sz
+        scale_matrix[:, 3, 3] = 1.0
+
+        mapping = {'s': scale_matrix, 'r': rotate_matrix, 't': translate_matrix}
+        return np.matmul(np.matmul(mapping[transform_order[2]], mapping[transform_order[1]]),
+                         mapping[transform_order[0]])
+
     def _decompose_rst(self):
         return self._decompose_srt()
 
@@ -731,6 +802,25 @@ class Matrix_44f(MatrixBase):
 
         return None
 
+    @classmethod
+    def decompose_many(cls, m44, transform_order='srt', rotation_order='xyz'):
+        import numpy as np
+        if transform_order not in ('srt', 'rst', 'str', 'rts', 'tsr', 'trs'):
+            return None
+
+        m44 = np.asarray(m44, dtype=np.float64)
+        scale = np.sqrt((m44[:, :, :3] ** 2).sum(axis=1))
+        rotate = m44[:, :3, :3] / scale[:, np.newaxis, :]
+        translate = m44[:, :3, 3]
+        if transform_order in ('str', 'rts', 'tsr', 'trs'):
+            translate = np.matmul(np.linalg.inv(rotate), translate[:, :, np.newaxis])[:, :, 0]
+        if transform_order in ('tsr', 'trs'):
+            translate = translate / scale
+
+        return {'translate': tuple(translate.T),
+                'rotate'   : Matrix_33f.euler_angles_many(rotate, order=rotation_order),
+                'scale'    : tuple(scale.T)}
+
 
 if __name__ == '__main__':
     from quaternion import Quaternion
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+__author__ = 'andyguo'
+
+
+def _load_one(job):
+    cls, file_path, kwargs = job
+    try:
+        return file_path, cls.load(file_path, **kwargs), None
+    except Exception as e:
+        return file_path, None, e
+
+
+def _load_payload(job):
+    cls, file_path, kwargs = job
+    try:
+        return file_path, cls.load(file_path, **kwargs)._to_payload(), None
+    except Exception as e:
+        if type(e).__module__ != 'exceptions':
+            e = RuntimeError('{}: {}'.format(type(e).__name__, e))
+        return file_path, None, e
+
+
+def _iter_results(cls, pool, results, decode):
+    try:
+        for file_path, value, error in results:
+            if decode and value is not None:
+                value = cls._from_payload(value)
+            yield file_path, value, error
+    finally:
+        pool.close()
+        pool.join()
+
+
+def load_many(cls, file_paths, workers=4, executor='thread', ordered=True, **kwargs):
+    if executor == 'thread':
+        from multiprocessing.pool import ThreadPool
+        pool = ThreadPool(workers)
+        func = _load_one
+    elif executor == 'process':
+        from multiprocessing import Pool
+        pool = Pool(workers)
+        func = _load_payload
+    else:
+        raise ValueError('executor should be thread or process')
+
+    jobs = [(cls, file_path, kwargs) for file_path in file_paths]
+    results = pool.imap(func, jobs) if ordered else pool.imap_unordered(func, jobs)
+    results = _iter_results(cls, pool, results, executor == 'process')
+    return list(results) if ordered else results
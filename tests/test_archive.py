@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+__author__ = 'andyguo'
+
+import pytest
+from dayu_file_format.curve import Curve, CurveArchive, KeyFrame, Point2D
+
+
+def make_curve(offset):
+    c = Curve()
+    for i in range(5):
+        c.add(KeyFrame(Point2D(i + offset * 0.5, i * offset)))
+    return c
+
+
+class TestCurveArchive(object):
+    def test_write_and_read(self, tmpdir):
+        path = str(tmpdir.join('shot.bca'))
+        with CurveArchive(path, 'w') as archive:
+            for i in range(20):
+                archive.add('curve_{}'.format(i), make_curve(i), name='curve_{}'.format(i))
+            assert len(archive) == 20
+            assert archive.load('curve_3')[1] == make_curve(3)[1]
+
+            with pytest.raises(ValueError) as e:
+                archive.add('curve_3', make_curve(3))
+            with pytest.raises(ValueError) as e:
+                archive.add(3, make_curve(3))
+
+        archive = CurveArchive(path)
+        assert archive.names() == ['curve_{}'.format(i) for i in range(20)]
+        assert 'curve_7' in archive
+        assert 'missing' not in archive
+        loaded = archive.load('curve_7', compact=True)
+        assert loaded.compact
+        assert loaded.extra_data['name'] == 'curve_7'
+        assert list(loaded._times) == list(make_curve(7)._times)
+        assert loaded.eval(2.2) == make_curve(7).eval(2.2)
+        with pytest.raises(KeyError) as e:
+            archive.load('missing')
+        with pytest.raises(IOError) as e:
+            archive.add('new', make_curve(1))
+        archive.close()
+
+    def test_append(self, tmpdir):
+        path = str(tmpdir.join('append.bca'))
+        with CurveArchive(path, 'a') as archive:
+            archive.add('a', make_curve(1))
+        with CurveArchive(path, 'a') as archive:
+            assert archive.names() == ['a']
+            archive.add('b', make_curve(2))
+            archive.add('c', make_curve(3))
+        with CurveArchive(path) as archive:
+            assert archive.names() == ['a', 'b', 'c']
+            for name, offset in zip('abc', (1, 2, 3)):
+                assert archive.load(name)[4] == make_curve(offset)[4]
+
+    def test_append_keeps_old_toc(self, tmpdir):
+        path = str(tmpdir.join('append.bca'))
+        with CurveArchive(path, 'w') as archive:
+            archive.add('a', make_curve(1))
+
+        archive = CurveArchive(path, 'a')
+        archive.add('b', make_curve(2))
+        archive._file.close()
+
+        with CurveArchive(path) as archive:
+            assert archive.names() == ['a']
+            assert archive.load('a')[4] == make_curve(1)[4]
+
+    def test_repack(self, tmpdir):
+        import os
+        path = str(tmpdir.join('repack.bca'))
+        with CurveArchive(path, 'w') as archive:
+            for i in range(10):
+                archive.add('curve_{}'.format(i), make_curve(i))
+            assert archive.dead_bytes == 0
+        for i in range(10, 13):
+            with CurveArchive(path, 'a') as archive:
+                archive.add('curve_{}'.format(i), make_curve(i))
+
+        archive = CurveArchive(path, 'a')
+        dead_bytes = archive.dead_bytes
+        assert dead_bytes == sum(12 + 21 * 10 + 22 * i for i in range(3))
+        size = os.path.getsize(path)
+        archive.repack()
+        assert archive.dead_bytes == 0
+        assert os.path.getsize(path) == size - dead_bytes
+        archive.add('curve_13', make_curve(13))
+        archive.close()
+
+        with CurveArchive(path) as archive:
+            assert archive.names() == ['curve_{}'.format(i) for i in range(14)]
+            for i in range(14):
+                assert archive.load('curve_{}'.format(i))[4] == make_curve(i)[4]
+            with pytest.raises(IOError):
+                archive.repack()
+        assert not os.path.exists(path + '.repack')
+
+    def test_invalid_mode(self, tmpdir):
+        with pytest.raises(ValueError):
+            CurveArchive(str(tmpdir.join('append.bca')), 'x')
+
+    def test_invalid_file(self, tmpdir):
+        path = str(tmpdir.join('invalid.bca'))
+        CurveArchive(path, 'w').close()
+        with open(path, 'rb') as f:
+            f.seek(8)
+            assert f.read(8)[4:] == 'tocp'
+        with open(path, 'r+b') as f:
+            f.write('nope')
+        with pytest.raises(ValueError):
+            CurveArchive(path)
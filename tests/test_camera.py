@@ -0,0 +1,306 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+__author__ = 'andyguo'
+
+from dayu_file_format.camera.base import Camera, StereoCamera
+from dayu_file_format.camera.config import FIELD_CHANNELS
+from dayu_file_format.curve import KeyFrame, Point2D
+
+
+def make_camera():
+    camera = Camera()
+    camera.name = 'shot_cam'
+    for i in range(10):
+        camera.x.add(KeyFrame(Point2D(1001 + i, i * 2.0)))
+        camera.ry.add(KeyFrame(Point2D(1001 + i * 2, i * 5.0)))
+    camera.focal.add(KeyFrame(Point2D(1001, 35)))
+    return camera
+
+
+class TestCamera(object):
+    def test_probe(self, tmpdir):
+        path = str(tmpdir.join('shot.cam'))
+        make_camera().save(path, artist='someone')
+        info = Camera.probe(path)
+        assert info['global']['name'] == 'shot_cam'
+        assert info['global']['artist'] == 'someone'
+        assert len(info['channels']) == 34
+        assert info['channels']['x']['count'] == 10
+        assert (info['channels']['ry']['start'], info['channels']['ry']['end']) == (1001, 1019)
+        assert info['channels']['focal']['count'] == 1
+        assert info['channels']['a22']['count'] == 0
+
+    def test_load_many(self, tmpdir):
+        paths = [str(tmpdir.join('shot.cam')), str(tmpdir.join('broken.cam'))]
+        make_camera().save(paths[0])
+        with open(paths[1], 'w') as f:
+            f.write('{')
+
+        for executor in ('thread', 'process'):
+            (path, camera, error), (broken_path, broken, broken_error) = Camera.load_many(paths, executor=executor)
+            assert error is None
+            assert camera.name == 'shot_cam'
+            assert camera.x.eval(1003.5) == make_camera().x.eval(1003.5)
+            assert len(camera.matrix[2][2]) == 0
+            assert broken is None
+            assert isinstance(broken_error, ValueError)
+
+            (path, camera, error), = Camera.load_many(paths[:1], executor=executor, compact=True, channels=['x'])
+            assert camera.x.compact and camera.x.eval(1003.5) == make_camera().x.eval(1003.5)
+            assert len(camera.ry) == 0
+
+        stereo = StereoCamera()
+        stereo.right_inter_toe.add(KeyFrame(Point2D(1001, -0.5)))
+        for ext in ('cam', 'bcam'):
+            path = str(tmpdir.join('stereo.' + ext))
+            stereo.save(path)
+            for executor in ('thread', 'process'):
+                (path, camera, error), = StereoCamera.load_many([path], executor=executor)
+                assert camera.right_inter_toe.eval(1001) == -0.5
+                assert len(camera.left_inter_toe) == 0
+
+    def test_binary(self, tmpdir):
+        import os
+        import pytest
+        path = str(tmpdir.join('shot.bcam'))
+        camera = make_camera()
+        camera.fps = 25.0
+        camera.ccd = [36.0, 24.0]
+        camera.extra_data = {'lens': 'anamorphic'}
+        camera.x.method = 'linear'
+        camera.save(path, artist='someone')
+
+        for compact in (False, True):
+            loaded = Camera.load(path, compact=compact)
+            assert loaded.name == 'shot_cam'
+            assert loaded.fps == 25.0
+            assert loaded.ccd == [36.0, 24.0]
+            assert loaded.extra_data == {'lens': 'anamorphic', 'artist': 'someone'}
+            assert loaded.x.method == 'linear'
+            assert loaded.x.compact == compact
+            assert list(loaded.ry._times) == list(camera.ry._times)
+            assert len(loaded.matrix[1][1]) == 0
+            for t in (1000, 1003.25, 1010.5, 1030):
+                assert loaded.x.eval(t) == camera.x.eval(t)
+                assert loaded.ry.eval(t) == camera.ry.eval(t)
+
+        info = Camera.probe(path)
+        assert info['global']['artist'] == 'someone'
+        assert sorted(info['channels']) == ['focal', 'ry', 'x']
+        assert info['channels']['ry']['count'] == 10
+        assert info['channels']['ry']['end'] == 1019
+
+        with open(path, 'rb') as bf:
+            data = bf.read()
+        broken_path = str(tmpdir.join('broken.bcam'))
+        with open(broken_path, 'wb') as bf:
+            bf.write(data[:8] + 'XX' + data[10:])
+        with pytest.raises(ValueError):
+            Camera.load(broken_path)
+
+        empty_path = str(tmpdir.join('empty.bcam'))
+        Camera().save(empty_path)
+        assert Camera.load(empty_path).name == 'main'
+        assert os.path.getsize(empty_path) < os.path.getsize(path)
+
+    def test_convert_ascii_to_binary(self, tmpdir):
+        ascii_path = str(tmpdir.join('shot.cam'))
+        binary_path = str(tmpdir.join('shot.bcam'))
+        camera = make_camera()
+        camera.x.method = 'linear'
+        camera.save(ascii_path, artist='someone')
+
+        Camera.load(ascii_path).save(binary_path)
+        loaded = Camera.load(binary_path)
+        assert loaded.name == 'shot_cam'
+        assert loaded.extra_data == {'artist': 'someone'}
+        assert loaded.x.method == 'linear'
+        for name in ('x', 'ry', 'focal'):
+            assert list(loaded._get_channel(name)) == list(camera._get_channel(name))
+        assert len(loaded.y) == 0
+
+    def test_eval_range(self):
+        import itertools
+        import numpy as np
+        from dayu_file_format.lina.matrix import Matrix_44f
+        camera = make_camera()
+        for name in ('y', 'z', 'rx', 'rz', 'sx', 'sy', 'sz'):
+            for i in range(4):
+                getattr(camera, name).add(KeyFrame(Point2D(1001 + i * 3, (i + 1) * 7.5)))
+
+        times = [1000, 1002.5, 1007.75, 1020]
+        for transform_order, rotation_order in itertools.product(
+                [''.join(p) for p in itertools.permutations('srt')], [''.join(p) for p in itertools.permutations('xyz')]):
+            camera.transform_order, camera.rotation_order = transform_order, rotation_order
+            result = camera.eval_range(times)
+            assert result['matrix'].shape == (4, 4, 4)
+            for index, t in enumerate(times):
+                frame = camera.eval(t)
+                assert np.allclose(result['matrix'][index], [[frame.matrix[r][c] for c in range(4)] for r in range(4)])
+                assert result['x'][index] == frame.translate[0]
+                assert result['focal'][index] == frame.focal
+
+        result = Camera().eval_range(times)
+        assert np.allclose(result['matrix'], np.eye(4))
+        assert np.isnan(result['near']).all()
+        assert np.allclose(make_camera().eval_range(times, unit='mm')['x'], make_camera().eval_range(times)['x'] * 10)
+        assert make_camera().eval(1003.5, unit='mm').translate[0] == make_camera().eval(1003.5).translate[0] * 10
+
+    def test_eval_range_use_matrix(self):
+        import itertools
+        import numpy as np
+        from dayu_file_format.lina.matrix import Matrix_44f
+        times = [1001, 1004.5, 1010]
+        for transform_order, rotation_order in itertools.product(
+                [''.join(p) for p in itertools.permutations('srt')], [''.join(p) for p in itertools.permutations('xyz')]):
+            camera = Camera()
+            camera.transform_order, camera.rotation_order = transform_order, rotation_order
+            for t, angle in zip(times, (10, 25, 40)):
+                m44 = Matrix_44f.compose(5, 5, 5, angle, 20, -30, 2, 2, 2,
+                                         transform_order=transform_order, rotation_order=rotation_order)
+                for row, column in itertools.product(range(4), range(4)):
+                    camera.matrix[row][column].add(KeyFrame(Point2D(t, m44[row][column])))
+
+            result = camera.eval_range(times, use_matrix=True)
+            assert 'a03' not in result
+            for index, t in enumerate(times):
+                frame = camera.eval(t, use_matrix=True)
+                assert np.allclose(result['matrix'][index],
+                                   [[frame.matrix[r][c] for c in range(4)] for r in range(4)])
+                for field in ('translate', 'rotate', 'scale'):
+                    assert np.allclose([result[name][index] for name in FIELD_CHANNELS[field]],
+                                       getattr(frame, field))
+                assert np.allclose(frame.scale, (2, 2, 2))
+
+            result = camera.eval_range(times, unit='mm', use_matrix=True, fields=['translate'])
+            assert np.allclose(result['x'], camera.eval_range(times, use_matrix=True)['x'] * 10)
+            assert 'matrix' not in result and 'rx' not in result
+
+        camera = Camera()
+        m44 = Matrix_44f.compose(5, 5, 5, 10, 20, -30)
+        for row, column in itertools.product(range(4), range(4)):
+            camera.matrix[row][column].add(KeyFrame(Point2D(1001, m44[row][column])))
+        assert np.allclose(camera.eval(1004.5, use_matrix=True).translate, (5, 5, 5))
+        assert np.allclose(camera.eval(1004.5, unit='mm', use_matrix=True).translate, (50, 50, 50))
+        result = camera.eval_range(times, use_matrix=True, fields=['translate'])
+        assert np.allclose((result['x'], result['y'], result['z']), 5)
+
+    def test_lazy_load(self, tmpdir):
+        import json
+        import pickle
+        import pytest
+        camera = make_camera()
+        camera.matrix[0][3].add(KeyFrame(Point2D(1001, 12.5)))
+        for ext in ('cam', 'bcam'):
+            path = str(tmpdir.join('shot.' + ext))
+            camera.save(path)
+
+            loaded = Camera.load(path, lazy=True)
+            assert loaded.ry.eval(1004.5) == camera.ry.eval(1004.5)
+            assert loaded.ry is loaded.ry
+            assert loaded._get_channel('a03').eval(1001) == 12.5
+            assert len(loaded.matrix[3][3]) == 0
+            assert loaded.eval_range([1003.5])['focal'][0] == camera.focal.eval(1003.5)
+
+            selected = Camera.load(path, lazy=True, channels=['focal', 'a03'])
+            assert selected.focal.eval(1001) == 35
+            assert len(selected.x) == 0
+            assert selected.matrix[0][3].eval(1001) == 12.5
+            assert Camera.load(path, channels=['focal']).focal.eval(1001) == 35
+            single = Camera.load(path, channels='focal')
+            assert single.focal.eval(1001) == 35
+            assert len(single.x) == 0
+            with pytest.raises(ValueError):
+                Camera.load(path, channels=['focus_distance'])
+
+            restored = pickle.loads(pickle.dumps(Camera.load(path, lazy=True), pickle.HIGHEST_PROTOCOL))
+            assert restored.ry.eval(1004.5) == camera.ry.eval(1004.5)
+            assert restored.matrix[0][3].eval(1001) == 12.5
+            assert len(restored.z) == 0
+
+        path = str(tmpdir.join('broken.cam'))
+        camera.save(path)
+        with open(path) as jf:
+            data = json.load(jf)
+        data['channels']['focal']['keyframes'] = [None]
+        with open(path, 'w') as jf:
+            json.dump(data, jf)
+        loaded = Camera.load(path, lazy=True)
+        assert loaded.x.eval(1002) == camera.x.eval(1002)
+        with pytest.raises(TypeError):
+            loaded.focal
+        with pytest.raises(TypeError):
+            Camera.load(path)
+
+    def test_sparse_channels(self, tmpdir):
+        import pytest
+        from dayu_file_format.camera.base import EMPTY_CURVE
+        camera = Camera()
+        frame = camera.eval(1001)
+        assert frame.translate == (0.0, 0.0, 0.0) and frame.scale == (1.0, 1.0, 1.0)
+        assert frame.focal is None
+        assert camera._get_channel('focal') is EMPTY_CURVE
+        assert camera._get_channel('a12') is EMPTY_CURVE
+        assert 'focal' not in camera.__dict__ and 'matrix' not in camera.__dict__
+        with pytest.raises(TypeError):
+            EMPTY_CURVE.add(KeyFrame(Point2D(1, 1)))
+        with pytest.raises(TypeError):
+            EMPTY_CURVE.method = 'linear'
+        with pytest.raises(TypeError):
+            EMPTY_CURVE.extra_data['name'] = 'focal'
+        assert EMPTY_CURVE.method == 'cubic' and EMPTY_CURVE.extra_data == {}
+
+        camera.focal.add(KeyFrame(Point2D(1001, 35)))
+        assert camera.eval(1001).focal == 35
+        assert 'focal' in camera.__dict__ and 'focus' not in camera.__dict__
+        assert len(EMPTY_CURVE) == 0
+
+        for ext in ('cam', 'bcam'):
+            path = str(tmpdir.join('sparse.' + ext))
+            camera.save(path)
+            assert 'matrix' not in camera.__dict__
+            for lazy in (False, True):
+                loaded = Camera.load(path, lazy=lazy)
+                assert loaded.focal.eval(1001) == 35
+                assert loaded._get_channel('focus') is EMPTY_CURVE
+                assert loaded._get_channel('a12') is EMPTY_CURVE
+                assert 'focus' not in loaded.__dict__ and 'matrix' not in loaded.__dict__
+
+    def test_stereo_channels(self):
+        camera = StereoCamera()
+        camera.left_inter_toe.add(KeyFrame(Point2D(1001, 0.5)))
+        camera.right_inter_toe.add(KeyFrame(Point2D(1001, -0.5)))
+        assert camera.left_inter_toe.eval(1001) == 0.5
+        assert camera.right_inter_toe.eval(1001) == -0.5
+        assert len(camera.right_inter_axial) == 0
+
+    def test_eval_fields(self):
+        import pytest
+        camera = make_camera()
+        full = camera.eval(1003.5)
+
+        frame = camera.eval(1003.5, fields=['translate'])
+        assert frame.translate == full.translate
+        assert frame.matrix is None and frame.rotate is None and frame.focal is None
+
+        frame = camera.eval(1003.5, fields='focal')
+        assert frame.focal == full.focal
+        assert frame.translate is None and frame.matrix is None
+
+        frame = camera.eval(1003.5, fields=['matrix', 'pan'])
+        assert frame.matrix == full.matrix
+        assert frame.pan == full.pan
+        assert frame.translate is None and frame.scale is None
+
+        identity = Camera().eval(1001, use_matrix=True, fields=['matrix', 'scale'])
+        assert identity.matrix[2][2] == 1.0 and identity.scale == (1.0, 1.0, 1.0) and identity.translate is None
+
+        result = camera.eval_range([1003.5], fields=['focal', 'translate'])
+        assert sorted(result) == ['focal', 'time', 'x', 'y', 'z']
+        assert sorted(camera.eval_range([1003.5], fields=['matrix'])) == ['matrix', 'time']
+        result = camera.eval_range([1003.5], fields=['matrix', 'rotate'])
+        assert sorted(result) == ['matrix', 'rx', 'ry', 'rz', 'time']
+        assert result['ry'][0] == camera.ry.eval(1003.5)
+        with pytest.raises(ValueError):
+            camera.eval(1003.5, fields=['focal_length'])
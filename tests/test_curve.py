@@ -3,6 +3,9 @@
 
 __author__ = 'andyguo'
 
+import math
+import sys
+
 import pytest
 from dayu_file_format.curve.base import *
 
@@ -119,3 +122,565 @@ class TestCurve(object):
         assert c.clear() is True
         assert c.extra_data == {}
         assert c._keyframes == []
+
+    def test_eval_many(self):
+        c = Curve()
+        c.add(KeyFrame(Point2D(1, 1), right=Point2D(1, 0.66435778141).normalize()))
+        c.add(KeyFrame(Point2D(20, 9.835835457), left=Point2D(-1, -0.0664163604379).normalize(),
+                       right=Point2D(1, 0.0664163604379).normalize()))
+        c.add(KeyFrame(Point2D(50, 10.49999905), left=Point2D(-1, 5.68935010214e-10).normalize()))
+
+        xs = [x * 0.25 for x in range(-20, 240)]
+        for method in ('step', 'linear', 'hermite', 'cubic'):
+            result = c.eval_many(xs, method=method)
+            assert len(result) == len(xs)
+            for x, y in zip(xs, result):
+                assert round(c.eval(x, method=method) - y, 7) == 0
+
+        assert Curve().eval_many([1, 2, 3]) is None
+        with pytest.raises(AttributeError) as e:
+            c.eval_many(xs, method='unknown')
+
+    def test_eval_hermite(self, tmpdir):
+        c = Curve()
+        c.add(KeyFrame(Point2D(1001, 2.5), right=Point2D(1, 0.5)))
+        c.add(KeyFrame(Point2D(1010, -4.0), left=Point2D(-1, 1.5), right=Point2D(1, -1.5)))
+        c.add(KeyFrame(Point2D(1030, 7.25), left=Point2D(-1, -0.25)))
+        path = str(tmpdir.join('hermite.bcurve'))
+        c.save(path, bcurve_version=2)
+
+        for curve in (c, Curve.load(path, mmap=True)):
+            for k in c:
+                assert round(curve.eval(k.current.x, method='hermite') - k.current.y, 9) == 0
+            for x, slope in ((1001, 0.5), (1010, -1.5)):
+                assert round((curve.eval(x + 1e-6, method='hermite') - curve.eval(x, method='hermite')) / 1e-6
+                             - slope, 4) == 0
+            assert round(curve.eval(1009.999999, method='hermite') - -4.0, 4) == 0
+
+    def test_times(self):
+        k1 = KeyFrame(Point2D(0, 0))
+        k2 = KeyFrame(Point2D(2, 2))
+        k3 = KeyFrame(Point2D(3, 5))
+        k4 = KeyFrame(Point2D(4, 1))
+        k5 = KeyFrame(Point2D(5, 2))
+        c = Curve()
+        c.extend([k5, k3, k1, k4, k2])
+        assert list(c._times) == [0, 2, 3, 4, 5]
+
+        c.pop()
+        c.pop(0)
+        c.remove(k3)
+        assert list(c._times) == [k.current.x for k in c] == [2, 4]
+
+        c.clear()
+        assert len(c._times) == 0
+
+    def test_coefficient_cache(self):
+        c = Curve()
+        c.extend([KeyFrame(Point2D(0, 0), Point2D(-1, 0), Point2D(1, 0)),
+                  KeyFrame(Point2D(10, 10), Point2D(-1, 0), Point2D(1, 0))])
+        assert c.eval(5, method='linear') == 5
+        assert 'linear' in c._coefficients
+
+        c.add(KeyFrame(Point2D(5, 0), Point2D(-1, 0), Point2D(1, 0)))
+        assert c._coefficients == {}
+        assert c.eval(5, method='linear') == 0
+        assert c.eval(7.5, method='linear') == 5
+
+        c.pop()
+        assert c._coefficients == {}
+        assert c.eval(7.5, method='linear') == 0
+
+    def test_sample(self):
+        c = Curve()
+        c.add(KeyFrame(Point2D(1, 1), right=Point2D(1, 0.66435778141).normalize()))
+        c.add(KeyFrame(Point2D(20, 9.835835457), left=Point2D(-1, -0.0664163604379).normalize(),
+                       right=Point2D(1, 0.0664163604379).normalize()))
+        c.add(KeyFrame(Point2D(50, 10.49999905), left=Point2D(-1, 5.68935010214e-10).normalize()))
+
+        for method in ('step', 'linear', 'hermite', 'cubic'):
+            samples = list(c.sample(-5, 60, 0.25, method=method))
+            assert len(samples) == 261
+            assert samples[0][0] == -5
+            assert samples[-1][0] == 60
+            for x, y in samples:
+                assert round(c.eval(x, method=method) - y, 7) == 0
+
+        assert list(Curve().sample(0, 2, 1)) == [(0, None), (1, None), (2, None)]
+        assert list(c.sample(10, 0, 1)) == []
+        with pytest.raises(ValueError) as e:
+            list(c.sample(0, 10, 0))
+
+    def test_extend_merge(self):
+        k1 = KeyFrame(Point2D(0, 0))
+        k2 = KeyFrame(Point2D(2, 2))
+        k3 = KeyFrame(Point2D(2, 5))
+        k4 = KeyFrame(Point2D(4, 1))
+        k5 = KeyFrame(Point2D(5, 2))
+        c = Curve()
+        c.extend([k2, k5])
+        c.extend([k4, k3, k1])
+        assert [k for k in c] == [k1, k2, k3, k4, k5]
+        assert list(c._times) == [0, 2, 2, 4, 5]
+
+        with pytest.raises(ValueError) as e:
+            c.extend([k1, 1])
+        assert len(c) == 5
+
+    def test_from_arrays(self):
+        c = Curve.from_arrays([3, 1, 2], [30, 10, 20], right=[(1, 3), (1, 1), (1, 2)])
+        assert list(c._times) == [1, 2, 3]
+        assert c[0] == KeyFrame(Point2D(1, 10), Point2D(0, 0), Point2D(1, 1))
+        assert c[2] == KeyFrame(Point2D(3, 30), Point2D(0, 0), Point2D(1, 3))
+        assert c.eval(1.5, method='linear') == 15
+
+        with pytest.raises(ValueError) as e:
+            Curve.from_arrays([1, 2], [1])
+        with pytest.raises(ValueError) as e:
+            Curve.from_arrays([1, 2], [1, 2], left=[(0, 0)])
+
+    def test_compact(self):
+        import numpy as np
+        keyframes = [KeyFrame(Point2D(x, x * x % 7), Point2D(-1, x % 3), Point2D(1, x % 5)) for x in range(20)]
+        c = Curve()
+        c.extend(keyframes[::2])
+        c.extend(keyframes[1::2])
+        compact = Curve(compact=True)
+        compact.extend(keyframes[::2])
+        compact.extend(keyframes[1::2])
+
+        assert compact.compact
+        assert not c.compact
+        assert len(compact) == 20
+        assert compact._keyframes == c._keyframes
+        assert list(compact._times) == list(c._times)
+        assert compact[3] == keyframes[3]
+        for method in ('step', 'linear', 'hermite', 'cubic'):
+            for x in (-1.5, 0, 3.3, 10, 19, 22):
+                assert compact.eval(x, method=method) == c.eval(x, method=method)
+
+        assert compact.pop(2) == keyframes[2]
+        compact.remove(keyframes[4])
+        compact.add(keyframes[2])
+        assert list(compact._times) == [0, 1, 2, 3] + range(5, 20)
+        assert compact.find_nearest_keyframe(4.4) == keyframes[5]
+
+        columns = compact.to_numpy()
+        assert len(columns) == 6
+        assert np.shares_memory(columns[0], np.frombuffer(compact._times, dtype=np.float64))
+        data = np.array([[2, 20, -1, 0, 1, 0],
+                         [1, 10, -1, 0, 1, 0]], dtype=np.float64)
+        from_numpy = Curve.from_numpy(data)
+        assert from_numpy.compact
+        assert list(from_numpy._times) == [1, 2]
+        assert from_numpy.eval(1.5, method='linear') == 15
+        from_numpy.add(KeyFrame(Point2D(3, 30)))
+        assert list(from_numpy._times) == [1, 2, 3]
+
+        assert compact.clear() is True
+        assert compact.compact
+        assert len(compact) == 0
+
+    def test_simplify(self, tmpdir):
+        import math
+        import numpy as np
+        times = range(200)
+        values = [math.sin(t * 0.05) * 10 for t in times]
+        slopes = [math.cos(t * 0.05) * 0.5 for t in times]
+        left = [Point2D(-1, -s).normalize().to_list() for s in slopes]
+        right = [Point2D(1, s).normalize().to_list() for s in slopes]
+        original = Curve.from_arrays(times, values, left, right)
+        xs = [x * 0.5 for x in range(-20, 420)]
+
+        for method in ('linear', 'cubic', 'step'):
+            c = Curve.from_arrays(times, values, left, right)
+            removed = c.simplify(0.01, method=method)
+            assert removed > 0
+            assert len(c) == 200 - removed
+            assert c[0].current == original[0].current
+            assert c[-1].current == original[-1].current
+            for x in xs:
+                assert abs(c.eval(x, method=method) - original.eval(x, method=method)) <= 0.01
+
+        random_state = np.random.RandomState(1)
+        times = np.cumsum(random_state.uniform(0.5, 1.5, 300))
+        values = np.cumsum(random_state.normal(0, 0.05, 300))
+        slopes = random_state.normal(0, 0.05, 300)
+        columns = (times, values, -np.ones(300), -slopes, np.ones(300), slopes)
+        xs = np.linspace(times[0] - 5, times[-1] + 5, 30001)
+        for method in ('linear', 'hermite', 'cubic', 'step'):
+            walk = Curve.from_numpy(columns)
+            c = Curve.from_numpy(columns)
+            assert c.simplify(0.05, method=method) > 0
+            assert np.abs(c.eval_many(xs, method) - walk.eval_many(xs, method)).max() <= 0.05 + 1e-9
+
+        c = Curve()
+        c.extend([KeyFrame(Point2D(t, 2 * t)) for t in range(10)])
+        assert c.simplify(0, method='linear') == 8
+        assert c.eval(-1, method='linear') == -2
+        assert c.eval(4.5, method='linear') == 9
+        assert c.eval(12, method='linear') == 24
+
+        with pytest.raises(ValueError) as e:
+            c.simplify(-1)
+
+        path = str(tmpdir.join('simplified.curve'))
+        original.save(path, simplify_tolerance=0.01)
+        loaded = Curve.load(path)
+        assert 2 < len(loaded) < len(original)
+        assert len(original) == 200
+
+    def test_load_mmap(self, tmpdir):
+        c = Curve()
+        c.add(KeyFrame(Point2D(1, 1), right=Point2D(1, 0.66435778141).normalize()))
+        c.add(KeyFrame(Point2D(20, 9.835835457), left=Point2D(-1, -0.0664163604379).normalize(),
+                       right=Point2D(1, 0.0664163604379).normalize()))
+        c.add(KeyFrame(Point2D(50, 10.49999905), left=Point2D(-1, 5.68935010214e-10).normalize()))
+        path = str(tmpdir.join('mapped.bcurve'))
+        c.save(path, name='test')
+
+        loaded = Curve.load(path)
+        mapped = Curve.load(path, mmap=True)
+        assert mapped.compact
+        assert mapped._keyframes.mapped
+        assert mapped.extra_data == {'name': 'test'}
+        assert mapped.method == 'cubic'
+        assert len(mapped) == 3
+        assert mapped[1] == loaded[1]
+        for method in ('step', 'linear', 'hermite', 'cubic'):
+            for x in (0, 1, 7.5, 20, 33.3, 50, 60):
+                assert mapped.eval(x, method=method) == loaded.eval(x, method=method)
+            assert list(mapped.eval_many([0, 7.5, 33.3, 60], method=method)) == \
+                   list(loaded.eval_many([0, 7.5, 33.3, 60], method=method))
+
+        mapped.add(KeyFrame(Point2D(30, 10)))
+        assert not mapped._keyframes.mapped
+        assert list(mapped._times) == [1, 20, 30, 50]
+
+    def test_convert_ascii_to_binary(self, tmpdir):
+        from dayu_file_format.curve import CurveArchive
+        c = Curve()
+        c.add(KeyFrame(Point2D(1, 1)))
+        c.add(KeyFrame(Point2D(10, 5)))
+        c.method = 'linear'
+        ascii_path = str(tmpdir.join('source.curve'))
+        c.save(ascii_path, name='test')
+
+        import json
+        with open(ascii_path) as f:
+            from_json = Curve.from_dict(json.load(f))
+        for loaded in (Curve.load(ascii_path), from_json):
+            assert type(loaded.method) is str
+            binary_path = str(tmpdir.join('converted.bcurve'))
+            loaded.save(binary_path)
+            converted = Curve.load(binary_path)
+            assert converted.method == 'linear'
+            assert converted.extra_data['name'] == 'test'
+            assert list(converted) == list(loaded)
+
+            archive_path = str(tmpdir.join('converted.curves'))
+            with CurveArchive(archive_path, 'w') as archive:
+                archive.add('source', loaded)
+            with CurveArchive(archive_path) as archive:
+                assert list(archive.load('source')) == list(loaded)
+
+    def test_load_binary_buffer(self, tmpdir):
+        c = Curve()
+        c.add(KeyFrame(Point2D(1, 1)))
+        c.add(KeyFrame(Point2D(20, 9.5), left=Point2D(-1, 0), right=Point2D(1, 0)))
+        path = str(tmpdir.join('buffer.bcurve'))
+        c.save(path, name='test', count=3, scale=0.5)
+
+        for compact in (False, True):
+            loaded = Curve.load(path, compact=compact)
+            assert loaded.compact == compact
+            assert loaded.extra_data == {'name': 'test', 'count': 3, 'scale': 0.5}
+            assert list(loaded._times) == [1, 20]
+            assert loaded[1] == c[1]
+            assert loaded[1].right == Point2D(1, 0)
+
+    def test_write_keyframe_part(self, tmpdir):
+        import struct
+        from StringIO import StringIO
+        c = Curve()
+        for i in range(10):
+            c.add(KeyFrame(Point2D(i, i * 0.3), left=Point2D(-1, 0.1), right=Point2D(1, -0.1)))
+        expected = struct.pack('>I 4s', 8 + 240, 'keyf') + ''.join(
+            struct.pack('>6f', k.current.x, k.current.y, k.left.x, k.left.y, k.right.x, k.right.y) for k in c)
+
+        for curve in (c, Curve.from_numpy(c.to_numpy())):
+            for chunk_size in (3, 10, 65536):
+                stream = StringIO()
+                curve._write_keyframe_part(stream, chunk_size=chunk_size)
+                assert stream.getvalue() == expected
+
+        path = str(tmpdir.join('chunks.bcurve'))
+        c.save(path)
+        mapped = Curve.load(path, mmap=True)
+        stream = StringIO()
+        mapped._write_keyframe_part(stream, chunk_size=4)
+        assert stream.getvalue() == expected
+
+        stream = StringIO()
+        Curve()._write_keyframe_part(stream)
+        assert stream.getvalue() == struct.pack('>I 4s', 8, 'keyf')
+
+    def test_save_version_2(self, tmpdir):
+        import struct
+        c = Curve()
+        for i in range(1000):
+            c.add(KeyFrame(Point2D(1001.5 + i * 0.125, math.sin(i * 0.1) * 1001.123456789)))
+        c.add(KeyFrame(Point2D(900.25, 3.0), right=Point2D(1, 0.5)))
+        path = str(tmpdir.join('v2.bcurve'))
+        c.save(path, bcurve_version=2, name='test', count=3)
+        with open(path, 'rb') as bf:
+            assert struct.unpack('>4s 2h 2s', bf.read(10)) == \
+                   ('curv', 2, 0, 'II' if sys.byteorder == 'little' else 'MM')
+
+        for loaded in (Curve.load(path), Curve.load(path, compact=True), Curve.load(path, mmap=True)):
+            assert loaded.extra_data == {'name': 'test', 'count': 3}
+            assert len(loaded) == len(c)
+            assert list(loaded._times) == list(c._times)
+            assert loaded[0] == c[0]
+            assert loaded[500].current.y == c[500].current.y
+
+        for start, end in ((-10, 0), (900.25, 900.25), (1001.6, 1040.3), (1033.5, 1100), (1100, 2000), (1060, 1060)):
+            part = Curve.load_range(path, start, end)
+            assert part.extra_data == {'name': 'test', 'count': 3}
+            assert 1 <= len(part) < len(c)
+            for x in (start, (start + end) / 2.0, end):
+                assert part.eval(x, method='linear') == c.eval(x, method='linear')
+                assert part.eval(x, method='cubic') == c.eval(x, method='cubic')
+
+        with pytest.raises(ValueError):
+            Curve.load_range(path, 10, 0)
+        with pytest.raises(ValueError):
+            c.save(path, bcurve_version=3)
+        for name in ('globals.curve', 'globals.bcurve'):
+            globals_path = str(tmpdir.join(name))
+            c.save(globals_path, version=3, compress=1, max_error=0.5, columnar='no', simplify='off')
+            loaded = Curve.load(globals_path)
+            assert len(loaded) == len(c)
+            assert dict((key, loaded.extra_data[key]) for key in ('version', 'compress', 'max_error', 'columnar',
+                                                                  'simplify')) == \
+                   {'version': 3, 'compress': 1, 'max_error': 0.5, 'columnar': 'no', 'simplify': 'off'}
+
+        old_path = str(tmpdir.join('v1.bcurve'))
+        c.save(old_path)
+        part = Curve.load_range(old_path, 1033.5, 1034)
+        assert list(part._times) == [1033.375, 1033.5, 1033.625, 1033.75, 1033.875, 1034, 1034.125]
+        assert Curve.load(old_path)[600].current.y != c[600].current.y
+
+    def test_load_swapped_byte_order(self, tmpdir):
+        import struct
+        from array import array
+        c = Curve()
+        for i in range(600):
+            c.add(KeyFrame(Point2D(1001 + i * 0.5, math.cos(i * 0.1) * 12.5)))
+        path = str(tmpdir.join('native.bcurve'))
+        c.save(path, bcurve_version=2)
+        with open(path, 'rb') as bf:
+            data = bf.read()
+
+        swapped = {'II': 'MM', 'MM': 'II'}
+        parts = [data[:8], swapped[data[8:10]], data[10:16]]
+        offset = 16
+        while offset < len(data):
+            atom_size, atom_type = struct.unpack_from('>I 4s', data, offset)
+            body = data[offset + 8:offset + atom_size]
+            if atom_type == 'tidx':
+                block = array('I', body[:4])
+                block.byteswap()
+                body = block.tostring() + body[4:8] + body[8:]
+                values = array('d', body[8:])
+                values.byteswap()
+                body = body[:8] + values.tostring()
+            elif atom_type == 'kf64':
+                values = array('d', body)
+                values.byteswap()
+                body = values.tostring()
+            parts.append(data[offset:offset + 8] + body)
+            offset += atom_size
+        path = str(tmpdir.join('swapped.bcurve'))
+        with open(path, 'wb') as bf:
+            bf.write(''.join(parts))
+
+        assert list(Curve.load(path)._times) == list(c._times)
+        part = Curve.load_range(path, 1200, 1201)
+        assert list(part._times) == [1199.5, 1200, 1200.5, 1201, 1201.5]
+        assert part.eval(1200.25, method='cubic') == c.eval(1200.25, method='cubic')
+
+    def test_save_compressed(self, tmpdir):
+        import os
+        c = Curve()
+        for i in range(500):
+            c.add(KeyFrame(Point2D(1001 + i, math.sin(i * 0.05) * 10.123456789),
+                           left=Point2D(-1, 0.25), right=Point2D(1, -0.25)))
+        c.add(KeyFrame(Point2D(1600.5, 1e300)))
+        raw_path = str(tmpdir.join('raw.bcurve'))
+        path = str(tmpdir.join('compressed.bcurve'))
+        c.save(raw_path, bcurve_version=2)
+        c.save(path, bcurve_compress=True, name='test')
+        assert os.path.getsize(path) < os.path.getsize(raw_path) / 2
+
+        compact_path = str(tmpdir.join('compact.bcurve'))
+        Curve.load(path, compact=True).save(compact_path, bcurve_compress=True)
+        for loaded in (Curve.load(path), Curve.load(path, mmap=True), Curve.load(compact_path)):
+            assert loaded.extra_data == {'name': 'test'}
+            assert len(loaded) == len(c)
+            assert loaded.to_numpy()[1].tolist() == c.to_numpy()[1].tolist()
+            assert loaded[10] == c[10]
+            assert loaded[-1].current.y == 1e300
+
+        part = Curve.load_range(path, 1100, 1102.5)
+        assert list(part._times) == [1099, 1100, 1101, 1102, 1103, 1104]
+        with pytest.raises(ValueError) as e:
+            c.save(path, bcurve_version=1, bcurve_compress=True)
+
+        c.clear()
+        c.save(path, bcurve_compress=True)
+        assert len(Curve.load(path)) == 0
+
+    def test_save_quantized(self, tmpdir):
+        import os
+        import numpy as np
+        times = np.arange(1001, 1301, dtype=np.float64) + 0.5
+        values = np.sin(times * 0.05) * 20
+        slopes = np.cos(times * 0.05)
+        norms = np.sqrt(1 + slopes * slopes)
+        c = Curve.from_numpy((times, values, -1 / norms, -slopes / norms, 1 / norms, slopes / norms))
+        raw_path = str(tmpdir.join('raw.bcurve'))
+        c.save(raw_path, bcurve_version=2)
+
+        sizes = []
+        for max_error in (0.1, 0.001, 1e-9):
+            path = str(tmpdir.join('quantized_{}.bcurve'.format(max_error)))
+            c.save(path, bcurve_max_error=max_error, name='test')
+            sizes.append(os.path.getsize(path))
+            loaded = Curve.load(path)
+            assert loaded.extra_data == {'name': 'test'}
+            assert list(loaded._times) == list(times)
+            xs = np.linspace(times[0] - 100, times[-1] + 500, 60001)
+            assert np.abs(loaded.eval_many(xs) - c.eval_many(xs)).max() <= max_error
+            assert Curve.load_range(path, 1100, 1110).eval(1105.3) == loaded.eval(1105.3)
+        assert sizes[0] < sizes[1] < os.path.getsize(raw_path) < sizes[2] + 200
+
+        random_state = np.random.RandomState(7)
+        for method in ('cubic', 'hermite', 'linear', 'step'):
+            for _ in range(20):
+                times = np.cumsum(np.concatenate(([1001], random_state.uniform(5, 120, 5))))
+                angles = random_state.uniform(-1.5, 1.5, (2, 6))
+                wide = Curve.from_numpy((times, random_state.uniform(-10, 10, 6), -np.cos(angles[0]),
+                                         -np.sin(angles[0]), np.cos(angles[1]), np.sin(angles[1])))
+                wide.method = method
+                path = str(tmpdir.join('wide.bcurve'))
+                wide.save(path, bcurve_max_error=0.001)
+                xs = np.linspace(times[0] - 200, times[-1] + 200, 20001)
+                assert np.abs(Curve.load(path).eval_many(xs) - wide.eval_many(xs)).max() <= 0.001
+
+        raw_data = open(raw_path, 'rb').read()
+        with pytest.raises(ValueError):
+            c.save(raw_path, bcurve_max_error=0)
+        with pytest.raises(ValueError):
+            c.save(raw_path, bcurve_max_error=0.1, bcurve_compress=True)
+        assert open(raw_path, 'rb').read() == raw_data
+
+        empty_path = str(tmpdir.join('empty.bcurve'))
+        Curve().save(empty_path, bcurve_max_error=0.1)
+        assert len(Curve.load(empty_path)) == 0
+
+    def test_columnar_dict(self, tmpdir):
+        import json
+        c = Curve()
+        c.method = 'hermite'
+        for i in range(30):
+            c.add(KeyFrame(Point2D(30 - i * 0.75, i * 0.1), left=Point2D(-1, 0.5), right=Point2D(1, -0.5)))
+        data = c.to_dict(json_columnar=True)
+        assert sorted(data['keyframes_v2']) == sorted(['x', 'y', 'left_x', 'left_y', 'right_x', 'right_y'])
+        assert data['keyframes_v2']['x'] == list(c._times)
+
+        for compact in (False, True):
+            loaded = Curve.from_dict(json.loads(json.dumps(data)), compact=compact)
+            assert loaded.compact == compact
+            assert loaded.method == 'hermite'
+            assert list(loaded._times) == list(c._times)
+            assert loaded[7] == c[7]
+        assert Curve.from_dict(c.to_dict())[7] == c[7]
+
+        path = str(tmpdir.join('columnar.curve'))
+        c.save(path, json_columnar=True, name='columnar')
+        with open(path) as f:
+            assert 'keyframes_v2' in json.load(f)
+        loaded = Curve.load(path)
+        assert loaded.extra_data == {'name': 'columnar'}
+        assert [k.to_list() for k in loaded] == [k.to_list() for k in c]
+
+        data['keyframes_v2']['y'].pop()
+        with open(path, 'w') as f:
+            json.dump(data, f)
+        with pytest.raises(ValueError) as e:
+            Curve.load(path)
+
+    def test_probe(self, tmpdir):
+        c = Curve()
+        c.method = 'linear'
+        for i in range(300):
+            c.add(KeyFrame(Point2D(1001 + i * 0.5, i * 0.1), left=Point2D(-1, 0.5), right=Point2D(1, -0.5)))
+
+        for file_name, kwargs, layout in (('rows.curve', {}, 'keyframes'),
+                                          ('columnar.curve', {'json_columnar': True}, 'keyframes_v2'),
+                                          ('v1.bcurve', {}, 'keyf'),
+                                          ('v2.bcurve', {'bcurve_version': 2}, 'kf64'),
+                                          ('compressed.bcurve', {'bcurve_compress': True}, 'keyz'),
+                                          ('quantized.bcurve', {'bcurve_max_error': 0.01}, 'keyq')):
+            path = str(tmpdir.join(file_name))
+            c.save(path, name='probe', **kwargs)
+            info = Curve.probe(path)
+            assert info['format'] == layout
+            assert info['count'] == 300
+            assert info['start'] == 1001
+            assert info['end'] == 1150.5
+            assert info['method'] == 'linear'
+            assert info['global']['name'] == 'probe'
+
+            Curve().save(path, **kwargs)
+            info = Curve.probe(path)
+            assert (info['count'], info['start'], info['end']) == (0, None, None)
+
+        with open(str(tmpdir.join('pretty.curve')), 'w') as f:
+            f.write('{"keyframes": [\n  [[1, 2],\n   [0, 0], [0, 0]],\n  [[4, 5], [0, 0], [0, 0]]\n ],\n'
+                    ' "global": {"a": "[}"}, "method": "step", "other": [1, 2]}')
+        assert Curve.probe(str(tmpdir.join('pretty.curve'))) == \
+               {'global': {'a': '[}'}, 'method': 'step', 'format': 'keyframes', 'count': 2, 'start': 1, 'end': 4}
+        with pytest.raises(IOError) as e:
+            Curve.probe('curve.txt')
+
+    def test_load_many(self, tmpdir):
+        paths = []
+        for i in range(6):
+            c = Curve()
+            for j in range(i + 1):
+                c.add(KeyFrame(Point2D(j, j * i)))
+            path = str(tmpdir.join('{}.{}'.format(i, 'curve' if i % 2 else 'bcurve')))
+            c.save(path, name='c{}'.format(i))
+            paths.append(path)
+        paths.insert(3, str(tmpdir.join('missing.bcurve')))
+
+        for executor in ('thread', 'process'):
+            results = Curve.load_many(paths, workers=3, executor=executor, compact=True)
+            assert [r[0] for r in results] == paths
+            assert results[3][1] is None
+            assert isinstance(results[3][2], IOError)
+            loaded = [r[1] for r in results if r[1] is not None]
+            assert [len(c) for c in loaded] == [1, 2, 3, 4, 5, 6]
+            assert [c.extra_data['name'] for c in loaded] == ['c0', 'c1', 'c2', 'c3', 'c4', 'c5']
+            assert all(c.compact for c in loaded)
+            assert loaded[4][4] == Curve.load(paths[5])[4]
+
+            unordered = list(Curve.load_many(paths, workers=3, executor=executor, ordered=False))
+            assert sorted(r[0] for r in unordered) == sorted(paths)
+            assert sum(1 for r in unordered if r[2] is not None) == 1
+            assert not any(r[1].compact for r in unordered if r[1] is not None)
+
+        with pytest.raises(ValueError) as e:
+            Curve.load_many(paths, executor='fiber')
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+__author__ = 'andyguo'
+
+import pytest
+from numbers import Number
+from dayu_file_format import deco
+from dayu_file_format.deco import data_type_validation
+
+
+class Dummy(object):
+    @data_type_validation(x=Number, y=Number, z=(int, str))
+    def __init__(self, x, y=1, z=0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+    @classmethod
+    @data_type_validation(l=list)
+    def from_list(cls, l):
+        return cls(*l)
+
+
+class TestDataTypeValidation(object):
+    def test_positional(self):
+        assert Dummy(1, 2.0, 'a').z == 'a'
+        with pytest.raises(ValueError) as e:
+            Dummy('1')
+        with pytest.raises(ValueError) as e:
+            Dummy(1, 2, 3.0)
+
+    def test_keyword(self):
+        assert Dummy(x=1, z=2).y == 1
+        with pytest.raises(ValueError) as e:
+            Dummy(1, y='2')
+        with pytest.raises(TypeError) as e:
+            Dummy()
+
+    def test_classmethod(self):
+        assert Dummy.from_list([1, 2, 3]).y == 2
+        with pytest.raises(ValueError) as e:
+            Dummy.from_list((1, 2, 3))
+
+    def test_set_validation(self):
+        deco.set_validation(False)
+        try:
+            assert Dummy('1').x == '1'
+        finally:
+            deco.set_validation(True)
+        with pytest.raises(ValueError) as e:
+            Dummy('1')
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- encoding: utf-8 -*-
+
+__author__ = 'andyguo'
+
+import pytest
+from dayu_file_format.curve import Curve, CurveReader, CurveWriter, KeyFrame, Point2D
+
+
+class TestCurveWriter(object):
+    def test_append(self, tmpdir):
+        path = str(tmpdir.join('live.bcurve'))
+        writer = CurveWriter(path, method='linear', buffer_size=4, name='tracker')
+        assert len(Curve.load(path)) == 0
+
+        writer.append(KeyFrame(Point2D(1, 1)))
+        writer.append_many(KeyFrame(Point2D(i, i * 2), right=Point2D(1, 0)) for i in range(2, 6))
+        assert len(writer) == 5
+        loaded = Curve.load(path)
+        assert len(loaded) == 4
+        assert loaded.method == 'linear'
+        assert loaded.extra_data == {'name': 'tracker'}
+
+        writer.flush()
+        loaded = Curve.load(path)
+        assert list(loaded._times) == [1, 2, 3, 4, 5]
+        assert loaded[4] == KeyFrame(Point2D(5, 10), right=Point2D(1, 0))
+
+        with pytest.raises(ValueError) as e:
+            writer.append(KeyFrame(Point2D(3, 1)))
+        with pytest.raises(ValueError) as e:
+            writer.append(3)
+
+        writer.append(KeyFrame(Point2D(6, 1)))
+        writer.close()
+        writer.close()
+        assert len(Curve.load(path)) == 6
+        assert len(Curve.load(path, mmap=True)) == 6
+
+    def test_context_manager(self, tmpdir):
+        path = str(tmpdir.join('session.bcurve'))
+        with CurveWriter(path) as writer:
+            writer.append_many(KeyFrame(Point2D(i * 0.5, i)) for i in range(1000))
+        loaded = Curve.load(path)
+        assert len(loaded) == 1000
+        assert loaded.method == 'cubic'
+        assert loaded.eval(100.25) == Curve.load(path, compact=True).eval(100.25)
+
+
+class TestCurveReader(object):
+    def test_read(self, tmpdir):
+        import json
+        c = Curve()
+        c.method = 'linear'
+        for i in range(50):
+            c.add(KeyFrame(Point2D(i * 0.5, i * 1.5e-7), left=Point2D(-1, 0.5), right=Point2D(1, -0.5)))
+        path = str(tmpdir.join('stream.curve'))
+        c.save(path, name='reader')
+        pretty_path = str(tmpdir.join('pretty.curve'))
+        data = c.to_dict()
+        data['keyframes'].reverse()
+        data['unknown'] = {'nested': [1, 2, {'a': 'b'}]}
+        with open(pretty_path, 'w') as f:
+            json.dump(data, f, indent=4)
+
+        for file_path in (path, pretty_path):
+            for chunk_size in (1, 7, 65536):
+                reader = CurveReader(file_path, chunk_size=chunk_size)
+                progress = list(reader)
+                assert progress[-1] == (50, reader.total_size, reader.total_size)
+                assert [p[1] for p in progress] == sorted(p[1] for p in progress)
+                loaded = reader.curve
+                assert loaded.compact
+                assert loaded.method == 'linear'
+                assert loaded.extra_data == {'name': 'reader'}
+                assert list(loaded._times) == list(c._times)
+                assert loaded[20] == c[20]
+
+        loaded = Curve.load(pretty_path)
+        assert not loaded.compact
+        assert loaded[49] == c[49]
+
+    def test_invalid(self, tmpdir):
+        path = str(tmpdir.join('broken.curve'))
+        for content in ('', '[]', '{"keyframes": [[[1, 2], [0, 0], [0, 0]], [[2, 3]', '{"keyframes": 1}'):
+            with open(path, 'w') as f:
+                f.write(content)
+            with pytest.raises(ValueError) as e:
+                CurveReader(path, chunk_size=4).read()